@@ -29,4 +29,38 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import importlib
+
 from .version import __version__, __author__, __email__, __repository__, __license__
+
+# The classes are imported on first use, so the command line, e.g. forwarding a command
+# to the agent, does not pay for importing the HTTP client and the upload pipeline.
+_EXPORTS = {
+    "Superset": ".superset",
+    "ResponseData": ".superset",
+    "UploadBatcher": ".batcher",
+    "UploadPipeline": ".pipeline",
+    "SchemaError": ".schema",
+    "AsyncJob": ".async_query",
+    "AsyncQueryPoller": ".async_query",
+    "UploadLedger": ".ledger"
+}
+
+__all__ = ["__version__", "__author__", "__email__", "__repository__", "__license__",
+           *_EXPORTS]
+
+
+def __getattr__(name: str):
+    """Imports the exported classes on first access."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list:
+    """Lists the exported names including the ones not imported yet."""
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -36,11 +36,16 @@
 import sys
 import argparse
 import logging
+import multiprocessing
+from typing import TYPE_CHECKING
 
 from pySupersetCli.version import __version__, __author__, __email__, __repository__, __license__
 from pySupersetCli.ret import Ret
-from pySupersetCli.superset import Superset
 from pySupersetCli.cmd_upload import register as cmd_upload_register
+from pySupersetCli import agent
+
+if TYPE_CHECKING:
+    from pySupersetCli.superset import Superset
 
 
 ################################################################################
@@ -125,9 +130,116 @@ def add_parser() -> argparse.ArgumentParser:
                         action="store_true",
                         help="Use basic authentication instead of LDAP.")
 
+    parser.add_argument("--agent_socket",
+                        type=str,
+                        metavar='<socket_path>',
+                        default=agent.DEFAULT_SOCKET_PATH,
+                        help="The Unix socket of the agent. Commands are forwarded to " +
+                        "an agent listening on it. Default: " + agent.DEFAULT_SOCKET_PATH)
+
+    parser.add_argument("--no_agent",
+                        action="store_true",
+                        help="Do not forward the command to a running agent.")
+
     return parser
 
 
+def _execute_command(args, commands: list) -> Ret:
+    """ Create the Superset client and execute the selected command with it.
+
+    Args:
+        args (obj): The command line arguments.
+        commands (list): The registered commands.
+
+    Returns:
+        Ret: The status of the command execution.
+    """
+    # Imported only here, a command forwarded to the agent does not need the HTTP client.
+    # pylint: disable-next=import-outside-toplevel
+    from pySupersetCli.superset import Superset
+
+    ret_status = Ret.OK
+
+    # Create Superset client.
+    try:
+        verify_ssl = not args.no_ssl
+        provider = Superset.Provider.LDAP
+
+        if args.basic_auth:
+            provider = Superset.Provider.DB
+
+        client = Superset(args.server,
+                          args.user,
+                          args.password,
+                          provider,
+                          verify_ssl=verify_ssl)
+
+    except RuntimeError as e:
+        LOG.error("Failed to create Superset client: %s", e)
+        ret_status = Ret.ERROR_LOGIN
+
+    else:
+        # The agent serves the commands of other calls until it is terminated.
+        if args.cmd == agent.CMD_NAME:
+            ret_status = _serve_agent(args, client, commands)
+        else:
+            ret_status = _execute_handler(args, client, commands)
+
+    return ret_status
+
+
+def _serve_agent(args, client: "Superset", commands: list) -> Ret:
+    """ Run the agent with the logged in client.
+
+    Args:
+        args (obj): The command line arguments.
+        client (Superset): The Superset client object.
+        commands (list): The registered commands.
+
+    Returns:
+        Ret: The status of the agent after termination.
+    """
+    ret_status = Ret.OK
+
+    if agent.is_supported() is True:
+        ret_status = agent.Agent(args, client, commands).serve(args.agent_socket)
+    else:
+        LOG.error("The agent requires Unix socket support.")
+        ret_status = Ret.ERROR_AGENT
+
+    return ret_status
+
+
+def _execute_handler(args, client: "Superset", commands: list) -> Ret:
+    """ Find the handler of the selected command and execute it.
+
+    Args:
+        args (obj): The command line arguments.
+        client (Superset): The Superset client object.
+        commands (list): The registered commands.
+
+    Returns:
+        Ret: The status of the command execution.
+    """
+    ret_status = Ret.OK
+    handler = None
+
+    # Find the command handler.
+    for command in commands:
+        if command["name"] == args.cmd:
+            handler = command["handler"]
+            break
+
+    # Execute the command.
+    if handler is not None:
+        ret_status = handler(args, client)
+    else:
+        LOG.error("Command '%s' not found!", args.cmd)
+        ret_status = Ret.ERROR_INVALID_ARGUMENTS
+
+    return ret_status
+
+
 def main() -> Ret:
     """ The program entry point function.
 
@@ -146,6 +258,9 @@ def main() -> Ret:
         cmd_par_dict = cmd_register(subparser)
         commands.append(cmd_par_dict)
 
+    # The agent executes the other commands and is registered separately.
+    agent.register(subparser)
+
     # Parse the command line arguments.
     args = parser.parse_args()
 
@@ -161,39 +276,16 @@ def main() -> Ret:
             for arg in vars(args):
                 LOG.info("* %s = %s", arg, vars(args)[arg])
 
-        # Create Superset client.
-        try:
-            verify_ssl = not args.no_ssl
-            provider = Superset.Provider.LDAP
+        forwarded_status = None
 
-            if args.basic_auth:
-                provider = Superset.Provider.DB
+        # Let a running agent execute the command with its logged in client.
+        if (args.cmd != agent.CMD_NAME) and (args.no_agent is False):
+            forwarded_status = agent.forward(args)
 
-            # pylint: disable=unused-variable
-            client = Superset(args.server,
-                              args.user,
-                              args.password,
-                              provider,
-                              verify_ssl=verify_ssl)
-
-        except RuntimeError as e:
-            LOG.error("Failed to create Superset client: %s", e)
-            ret_status = Ret.ERROR_LOGIN
+        if forwarded_status is not None:
+            ret_status = forwarded_status
         else:
-            handler = None
-
-            # Find the command handler.
-            for command in commands:
-                if command["name"] == args.cmd:
-                    handler = command["handler"]
-                    break
-
-            # Execute the command.
-            if handler is not None:
-                ret_status = handler(args, client)
-            else:
-                LOG.error("Command '%s' not found!", args.cmd)
-                ret_status = Ret.ERROR_INVALID_ARGUMENTS
+            ret_status = _execute_command(args, commands)
 
     return ret_status
 
@@ -203,4 +295,7 @@ def main() -> Ret:
 
 
 if __name__ == "__main__":
+    # The upload pipeline starts worker processes. In the executable built by PyInstaller,
+    # they must run the worker instead of the command line.
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,380 @@
+"""Agent mode which keeps a logged in Superset client running."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+import argparse
+import getpass
+import hashlib
+import hmac
+import json
+import logging
+import os
+import signal
+import socket
+import stat
+import tempfile
+from typing import TYPE_CHECKING, Optional
+from pySupersetCli.ret import Ret
+
+if TYPE_CHECKING:
+    from pySupersetCli.superset import Superset
+
+################################################################################
+# Variables
+################################################################################
+
+LOG: logging.Logger = logging.getLogger(__name__)
+CMD_NAME = "agent"
+# The runtime directory is private to the user. The temporary directory is shared,
+# so the owner of the socket is checked before anything is sent to it.
+DEFAULT_SOCKET_PATH = (os.path.join(os.environ["XDG_RUNTIME_DIR"], "pySupersetCli.sock")
+                       if os.environ.get("XDG_RUNTIME_DIR") else
+                       os.path.join(tempfile.gettempdir(),
+                                    f"pySupersetCli-{getpass.getuser()}.sock"))
+
+# Arguments which identify the Superset session of the agent.
+_SESSION_ARGS = ("server", "user", "password", "no_ssl", "basic_auth")
+# Forwarded instead of the password.
+_SESSION_DIGEST = "session_digest"
+_CONNECT_TIMEOUT = 1.0  # Seconds
+_ENCODING = "utf-8"
+
+################################################################################
+# Classes
+################################################################################
+
+
+class _LogCollector(logging.Handler):
+    """
+    Collects the log records of a forwarded command,
+    so they can be sent back to the calling process.
+    """
+
+    def __init__(self, level: int) -> None:
+        super().__init__(level)
+        self.records: list = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append([record.levelno, record.name, record.getMessage()])
+
+
+class Agent:  # pylint: disable=too-few-public-methods
+    """
+    Keeps one authenticated Superset client resident and executes
+    the commands forwarded by other pySupersetCli calls over a local Unix socket.
+    The commands are executed one after the other.
+    """
+
+    def __init__(self, args, superset_client: "Superset", commands: list) -> None:
+        """
+        Initializes the agent.
+
+        Args:
+            args (obj): The command line arguments the agent was started with.
+            superset_client (Superset): The logged in Superset client.
+            commands (list): The registered commands, as returned by their register function.
+        """
+        self._session_digest: str = _get_session_digest(vars(args))
+        self._client: "Superset" = superset_client
+        self._handlers: dict = {command["name"]: command["handler"]
+                                for command in commands
+                                if command["name"] != CMD_NAME}
+
+    def serve(self, socket_path: str) -> Ret:
+        """
+        Listens on the socket and executes the forwarded commands until terminated.
+
+        Args:
+            socket_path (str): Path of the Unix socket to listen on.
+
+        Returns:
+            Ret: The status of the agent after termination.
+        """
+        ret_status = Ret.OK
+
+        if _is_agent_running(socket_path) is True:
+            LOG.error("An agent is already listening on %s.", socket_path)
+            ret_status = Ret.ERROR_AGENT
+        else:
+            # Only the current user may connect to the agent.
+            old_umask = os.umask(0o177)
+
+            try:
+                # Remove a stale socket left by an agent which was not shut down cleanly.
+                if os.path.lexists(socket_path):
+                    if _is_own_socket(socket_path) is False:
+                        raise OSError(f"{socket_path} is not a socket of the current user.")
+
+                    os.remove(socket_path)
+
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_socket:
+                    server_socket.bind(socket_path)
+                    os.umask(old_umask)
+                    server_socket.listen()
+
+                    signal.signal(signal.SIGTERM, _on_terminate)
+                    LOG.warning("Agent listening on %s.", socket_path)
+
+                    while True:
+                        connection, _ = server_socket.accept()
+
+                        with connection:
+                            self._serve_connection(connection)
+
+            except KeyboardInterrupt:
+                LOG.warning("Agent stopped.")
+
+            except OSError as e:
+                LOG.error("Agent error: %s", e)
+                ret_status = Ret.ERROR_AGENT
+
+            finally:
+                os.umask(old_umask)
+
+                if _is_own_socket(socket_path) is True:
+                    os.remove(socket_path)
+
+        return ret_status
+
+    def _serve_connection(self, connection: socket.socket) -> None:
+        """
+        Reads one forwarded command from the connection and sends back its result.
+
+        Args:
+            connection (socket.socket): The accepted client connection.
+        """
+        with connection.makefile("rwb") as stream:
+            line = stream.readline()
+
+            # Connections without request only probe whether the agent is running.
+            if line == b"":
+                return
+
+            try:
+                request = json.loads(line.decode(_ENCODING))
+                response = self._execute_request(request)
+            except (ValueError, KeyError, TypeError) as e:
+                LOG.error("Invalid agent request: %s", e)
+                response = {"accepted": False}
+
+            try:
+                stream.write(json.dumps(response).encode(_ENCODING) + b"\n")
+                stream.flush()
+            except OSError as e:
+                LOG.error("Failed to send agent response: %s", e)
+
+    def _execute_request(self, request: dict) -> dict:
+        """
+        Executes a forwarded command with the resident Superset client.
+
+        Args:
+            request (dict): The forwarded command line arguments and working directory.
+
+        Returns:
+            dict: The response for the calling process.
+        """
+        forwarded_args = dict(request["args"])
+        session_digest = str(forwarded_args.pop(_SESSION_DIGEST))
+        args = argparse.Namespace(**forwarded_args)
+        handler = self._handlers.get(args.cmd)
+
+        # Only a command for the same server with the same credentials may use the session.
+        if (handler is None) or \
+                (hmac.compare_digest(session_digest, self._session_digest) is False):
+            return {"accepted": False}
+
+        collector = _LogCollector(logging.INFO if args.verbose else logging.WARNING)
+        root_logger = logging.getLogger()
+        root_level = root_logger.level
+        cwd = os.getcwd()
+
+        root_logger.addHandler(collector)
+        root_logger.setLevel(min(root_level, collector.level))
+
+        try:
+            # Relative paths of the command are resolved as in the calling process.
+            os.chdir(request["cwd"])
+            ret_status = handler(args, self._client)
+        except Exception as e:  # pylint: disable=broad-except
+            LOG.error("Exception: %s", e)
+            ret_status = Ret.ERROR_AGENT
+        finally:
+            os.chdir(cwd)
+            root_logger.setLevel(root_level)
+            root_logger.removeHandler(collector)
+
+        return {"accepted": True, "ret": int(ret_status), "logs": collector.records}
+
+################################################################################
+# Functions
+################################################################################
+
+
+def register(subparser) -> None:
+    """ Register the agent subparser command.
+        The agent is not a regular command, as it executes the other commands.
+
+    Args:
+        subparser (obj):   the command subparser provided via __main__.py
+    """
+    subparser.add_parser(CMD_NAME,
+                         help="Keep a logged in client running and execute the " +
+                         "commands of other calls with it. The socket path is set " +
+                         "with --agent_socket.")
+
+
+def is_supported() -> bool:
+    """ Check whether the platform provides Unix sockets for the agent.
+
+    Returns:
+        bool: True if the agent can be used, otherwise False.
+    """
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def forward(args) -> Optional[Ret]:
+    """ Forward the command to a running agent.
+
+    Args:
+        args (obj): The command line arguments.
+
+    Returns:
+        Optional[Ret]: The status of the command executed by the agent or
+            None if no agent took over the command.
+    """
+    ret_status = None
+    forwarded_args = dict(vars(args), password=None)
+    forwarded_args[_SESSION_DIGEST] = _get_session_digest(vars(args))
+    request = {"args": forwarded_args, "cwd": os.getcwd()}
+
+    if (is_supported() is False) or (os.path.lexists(args.agent_socket) is False):
+        return None
+
+    # The password digest must not be sent to a socket created by another user.
+    if _is_own_socket(args.agent_socket) is False:
+        LOG.warning("Ignoring %s, it is not a socket of the current user.", args.agent_socket)
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client_socket:
+            client_socket.settimeout(_CONNECT_TIMEOUT)
+            client_socket.connect(args.agent_socket)
+            client_socket.settimeout(None)
+
+            with client_socket.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode(_ENCODING) + b"\n")
+                stream.flush()
+                response = json.loads(stream.readline().decode(_ENCODING))
+
+    except OSError as e:
+        LOG.info("No agent available on %s: %s", args.agent_socket, e)
+
+    except ValueError as e:
+        LOG.error("Invalid agent response: %s", e)
+        ret_status = Ret.ERROR_AGENT
+
+    else:
+        if response.get("accepted") is True:
+            for level, name, message in response.get("logs", []):
+                logging.getLogger(name).log(level, "%s", message)
+
+            ret_status = Ret(response["ret"])
+        else:
+            LOG.info("Agent on %s did not accept the command.", args.agent_socket)
+
+    return ret_status
+
+
+def _get_session_digest(args: dict) -> str:
+    """ Get the digest of the arguments which identify the Superset session.
+        It is forwarded to the agent instead of the password.
+
+    Args:
+        args (dict): The command line arguments.
+
+    Returns:
+        str: The hex digest of the session arguments.
+    """
+    session = json.dumps([args.get(key) for key in _SESSION_ARGS])
+
+    return hashlib.sha256(session.encode(_ENCODING)).hexdigest()
+
+
+def _is_own_socket(socket_path: str) -> bool:
+    """ Check whether the path is a socket owned by the current user.
+
+    Args:
+        socket_path (str): Path of the Unix socket.
+
+    Returns:
+        bool: True if the socket exists and belongs to the current user, otherwise False.
+    """
+    try:
+        status = os.lstat(socket_path)
+    except OSError:
+        return False
+
+    return stat.S_ISSOCK(status.st_mode) and (status.st_uid == os.getuid())
+
+
+def _is_agent_running(socket_path: str) -> bool:
+    """ Check whether an agent is listening on the socket.
+
+    Args:
+        socket_path (str): Path of the Unix socket.
+
+    Returns:
+        bool: True if an agent accepts connections, otherwise False.
+    """
+    is_running = False
+
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe_socket:
+                probe_socket.settimeout(_CONNECT_TIMEOUT)
+                probe_socket.connect(socket_path)
+                is_running = True
+        except OSError:
+            pass
+
+    return is_running
+
+
+def _on_terminate(signum, frame) -> None:  # pylint: disable=unused-argument
+    """ Stop the agent on SIGTERM like on Ctrl+C. """
+    raise KeyboardInterrupt
+
+################################################################################
+# Main
+################################################################################
@@ -0,0 +1,269 @@
+"""Polling of asynchronously executed Superset queries."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Iterator, Optional
+import requests
+from pySupersetCli.superset import ResponseData, Superset
+
+################################################################################
+# Variables
+################################################################################
+
+LOG: logging.Logger = logging.getLogger(__name__)
+
+_API_PREFIX = "/api/v1"
+_EVENTS_ENDPOINT = "/async_event/"
+
+################################################################################
+# Classes
+################################################################################
+
+
+@dataclass
+class AsyncJob:
+    """
+    A query executed asynchronously by the Superset server.
+    """
+    job_id: str
+    status: str = "pending"
+    result_url: Optional[str] = None
+    errors: list = field(default_factory=list)
+    result: Optional[ResponseData] = None
+
+    STATUS_DONE = "done"
+    STATUS_ERROR = "error"
+
+    @property
+    def is_finished(self) -> bool:
+        """
+        True if the job is done or failed.
+        """
+        return self.status in (self.STATUS_DONE, self.STATUS_ERROR)
+
+
+class AsyncQueryPoller:  # pylint: disable=too-many-instance-attributes
+    """
+    Tracks many asynchronous queries of a Superset server with global async queries enabled.
+    Instead of one polling loop per query, all outstanding jobs are updated by a single
+    request for the async events of the user. The interval between the requests grows
+    while no job changes and falls back to the minimum as soon as one does.
+    """
+
+    def __init__(self,
+                 superset_client: Superset,
+                 *,
+                 min_interval: float = 0.5,
+                 max_interval: float = 10.0,
+                 backoff: float = 2.0) -> None:
+        """
+        Initializes the poller.
+
+        Args:
+            superset_client (Superset): The Superset client.
+            min_interval (float): Seconds between event requests while jobs change.
+            max_interval (float): Maximum seconds between event requests.
+            backoff (float): Factor the interval grows by after a request without changes.
+        """
+        self._client: Superset = superset_client
+        self._min_interval: float = min_interval
+        self._max_interval: float = max_interval
+        self._backoff: float = backoff
+        self._jobs: dict = {}
+        self._unfetched: list = []
+        self._finished: list = []
+        self._last_event_id: Optional[str] = None
+
+    def submit(self, endpoint: str, method: str = "POST", **request_kwargs) -> AsyncJob:
+        """
+        Sends a data request, e.g. to "/chart/data", and tracks the resulting job.
+        If the server answers synchronously, e.g. from its cache, the job is finished at once.
+
+        Args:
+            endpoint (str): The endpoint of the request after '/api/v1'.
+            method (str): The HTTP method of the request.
+            request_kwargs (dict): Additional keyword arguments for the request, e.g. json.
+
+        Returns:
+            AsyncJob: The submitted job.
+
+        Raises:
+            RuntimeError: The server rejected the request.
+        """
+        ret_code, ret_data = self._client.request(method, endpoint, **request_kwargs)
+
+        if requests.codes.accepted == ret_code:  # pylint: disable=no-member
+            job = AsyncJob(job_id=ret_data.get("job_id", ""),
+                           status=ret_data.get("status", "pending"))
+            self.track(job)
+        elif requests.codes.ok == ret_code:  # pylint: disable=no-member
+            job = AsyncJob(job_id="", status=AsyncJob.STATUS_DONE, result=ret_data)
+            self._finished.append(job)
+        else:
+            raise RuntimeError(f"Query request failed: [{ret_code}] {ret_data.get('message')}")
+
+        return job
+
+    def track(self, job: AsyncJob) -> None:
+        """
+        Tracks a job submitted by other means.
+
+        Args:
+            job (AsyncJob): The job with the ID assigned by the server.
+        """
+        self._jobs[job.job_id] = job
+
+    def as_completed(self, timeout: Optional[float] = None) -> Iterator[AsyncJob]:
+        """
+        Yields the jobs as they finish, with the result of each done job fetched.
+        All outstanding jobs are updated by one request per polling interval.
+
+        Args:
+            timeout (Optional[float]): Seconds until all jobs must be finished. No limit if None.
+
+        Yields:
+            AsyncJob: The next finished job.
+
+        Raises:
+            TimeoutError: Jobs are still outstanding after the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = self._min_interval
+
+        while self._finished or self._unfetched or self._jobs:
+            while self._finished:
+                yield self._finished.pop(0)
+
+            if not (self._unfetched or self._jobs):
+                break
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+
+            if (remaining is not None) and (remaining <= 0):
+                raise TimeoutError(f"{len(self._unfetched) + len(self._jobs)} " +
+                                   "async queries still outstanding.")
+
+            # The results are fetched one by one, so the deadline is checked between them.
+            if self._unfetched:
+                job = self._unfetched.pop(0)
+                self._fetch_result(job)
+                self._finished.append(job)
+                continue
+
+            if self._poll_events() is True:
+                interval = self._min_interval
+                continue
+
+            time.sleep(interval if remaining is None else min(interval, remaining))
+            interval = min(interval * self._backoff, self._max_interval)
+
+    def wait_all(self, timeout: Optional[float] = None) -> list:
+        """
+        Waits until all jobs are finished.
+
+        Args:
+            timeout (Optional[float]): Seconds until all jobs must be finished. No limit if None.
+
+        Returns:
+            list: The finished jobs in the order they finished.
+
+        Raises:
+            TimeoutError: Jobs are still outstanding after the timeout.
+        """
+        return list(self.as_completed(timeout))
+
+    def _poll_events(self) -> bool:
+        """
+        Requests the async events since the last request and updates the tracked jobs.
+
+        Returns:
+            bool: True if a tracked job changed, otherwise False.
+        """
+        is_changed = False
+        params = {} if self._last_event_id is None else {"last_id": self._last_event_id}
+        ret_code, ret_data = self._client.request("GET", _EVENTS_ENDPOINT, params=params)
+
+        if requests.codes.ok != ret_code:  # pylint: disable=no-member
+            LOG.warning("Requesting async events failed: [%d] %s",
+                        ret_code, ret_data.get("message"))
+            return False
+
+        for event in ret_data.get("result", []):
+            self._last_event_id = event.get("id", self._last_event_id)
+            job = self._jobs.get(event.get("job_id"))
+
+            if (job is None) or (job.status == event.get("status")):
+                continue
+
+            is_changed = True
+            job.status = event.get("status", job.status)
+            job.errors = event.get("errors") or []
+            job.result_url = event.get("result_url")
+
+            if job.is_finished:
+                del self._jobs[job.job_id]
+                self._unfetched.append(job)
+
+        return is_changed
+
+    def _fetch_result(self, job: AsyncJob) -> None:
+        """
+        Fetches the result of a done job from its result URL.
+
+        Args:
+            job (AsyncJob): The finished job.
+        """
+        if (job.status == AsyncJob.STATUS_DONE) and job.result_url:
+            endpoint = job.result_url
+
+            # The result URL contains the API prefix the client adds itself.
+            if endpoint.startswith(_API_PREFIX):
+                endpoint = endpoint[len(_API_PREFIX):]
+
+            ret_code, job.result = self._client.request("GET", endpoint)
+
+            if requests.codes.ok != ret_code:  # pylint: disable=no-member
+                job.status = AsyncJob.STATUS_ERROR
+                job.errors = [job.result.get("message")]
+
+################################################################################
+# Functions
+################################################################################
+
+################################################################################
+# Main
+################################################################################
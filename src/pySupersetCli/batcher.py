@@ -0,0 +1,306 @@
+"""Coalescing upload of rows produced by many threads."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+from pySupersetCli.superset import ResponseData, Superset
+from pySupersetCli.ledger import UploadLedger
+
+################################################################################
+# Variables
+################################################################################
+
+LOG: logging.Logger = logging.getLogger(__name__)
+
+################################################################################
+# Classes
+################################################################################
+
+
+class _Group:  # pylint: disable=too-few-public-methods
+    """
+    Rows buffered for one table of a database.
+    """
+
+    def __init__(self) -> None:
+        self.rows: list = []
+        self.size: int = 0
+        self.created: float = time.monotonic()
+
+
+class UploadBatcher:
+    """
+    Collects single rows from any number of threads and uploads them in bulk.
+    The rows are grouped by database and table. A group is uploaded with a single
+    request as soon as it reaches the row or byte limit or its oldest row reaches
+    the latency limit. The uploads are done by a background thread, which is the
+    only user of the Superset client while the batcher is open.
+
+    Adding rows does not block, unless the number of rows not uploaded yet reaches
+    the pending limit. Closing the batcher uploads all remaining rows.
+    """
+
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+    def __init__(self,
+                 superset_client: Superset,
+                 *,
+                 max_rows: int = 1000,
+                 max_bytes: int = 1000000,
+                 max_latency: float = 5.0,
+                 max_pending_rows: int = 100000,
+                 column_dates: Optional[list] = None,
+                 on_failure: Optional[Callable] = None,
+                 ledger: Optional[UploadLedger] = None) -> None:
+        """
+        Initializes the batcher and starts the upload thread.
+
+        Args:
+            superset_client (Superset): The Superset client used for the uploads.
+            max_rows (int): Number of rows of a group which triggers its upload.
+            max_bytes (int): Estimated CSV size in bytes of a group which triggers its upload.
+            max_latency (float): Seconds after which a group is uploaded at the latest.
+            max_pending_rows (int): Number of buffered and uploading rows at which adding blocks.
+            column_dates (Optional[list]): The columns to be parsed as dates.
+            on_failure (Optional[Callable]): Called with database, table, rows, response code
+                and response data if an upload fails.
+            ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+        """
+        if (max_rows < 1) or (max_pending_rows < max_rows):
+            raise ValueError("The pending limit must be at least the row limit of a group.")
+
+        self._client: Superset = superset_client
+        self._max_rows: int = max_rows
+        self._max_bytes: int = max_bytes
+        self._max_latency: float = max_latency
+        self._max_pending_rows: int = max_pending_rows
+        self._column_dates: Optional[list] = column_dates
+        self._on_failure: Optional[Callable] = on_failure
+        self._ledger: Optional[UploadLedger] = ledger
+
+        self._condition = threading.Condition()
+        self._groups: dict = {}
+        self._pending_rows: int = 0
+        self._flush_requested: int = 0
+        self._flush_done: int = 0
+        self._is_closed: bool = False
+        self._is_stopped: bool = False
+        self.uploaded_rows: int = 0
+        self.failed_rows: int = 0
+
+        self._thread = threading.Thread(target=self._run,
+                                        name="UploadBatcher",
+                                        daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "UploadBatcher":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add(self, database: int, table: str, row: dict, timeout: Optional[float] = None) -> None:
+        """
+        Adds a row for the upload to a table of a database.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            row (dict): The row, in which the keys are the columns.
+            timeout (Optional[float]): Maximum seconds to wait if the pending limit is reached.
+                Waits without limit if None.
+
+        Raises:
+            TimeoutError: The pending limit was still reached after the timeout.
+            RuntimeError: The batcher is closed or its upload thread has stopped.
+        """
+        # Estimate the size of the CSV line without encoding it.
+        size = len(row) + sum(len(str(value)) for value in row.values())
+
+        with self._condition:
+            is_free = self._condition.wait_for(
+                lambda: self._is_closed or self._is_stopped or
+                (self._pending_rows < self._max_pending_rows),
+                timeout)
+
+            if self._is_closed is True:
+                raise RuntimeError("The upload batcher is closed.")
+
+            if self._is_stopped is True:
+                raise RuntimeError("The upload thread of the batcher has stopped.")
+
+            if is_free is False:
+                raise TimeoutError("Too many rows are pending for upload.")
+
+            group = self._groups.get((database, table))
+
+            # A new group changes the time the upload thread has to wake up at.
+            if group is None:
+                group = _Group()
+                self._groups[(database, table)] = group
+                self._condition.notify_all()
+
+            group.rows.append(row)
+            group.size += size
+            self._pending_rows += 1
+
+            if (len(group.rows) >= self._max_rows) or (group.size >= self._max_bytes):
+                self._condition.notify_all()
+
+    def flush(self) -> None:
+        """
+        Uploads all rows added so far and waits until the uploads are done.
+
+        Raises:
+            RuntimeError: The upload thread has stopped before the batcher was closed.
+        """
+        with self._condition:
+            self._flush_requested += 1
+            generation = self._flush_requested
+            self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: (self._flush_done >= generation) or self._is_stopped)
+
+            if (self._flush_done < generation) and (self._is_closed is False):
+                raise RuntimeError("The upload thread of the batcher has stopped.")
+
+    def close(self) -> None:
+        """
+        Uploads all remaining rows and stops the upload thread.
+        Adding rows afterwards is not possible.
+        """
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify_all()
+
+        self._thread.join()
+
+    def _take_due_groups(self) -> tuple[list, int]:
+        """
+        Waits until groups are due for upload and removes them from the buffer.
+        Must be called with the condition held.
+
+        Returns:
+            tuple[list, int]: The due groups with their keys and the handled flush request.
+        """
+        while True:
+            now = time.monotonic()
+            flush_generation = self._flush_requested
+            is_flushing = self._is_closed or (flush_generation > self._flush_done)
+            due_keys = []
+            next_due = None
+
+            for key, group in self._groups.items():
+                due_time = group.created + self._max_latency
+
+                if is_flushing or \
+                        (len(group.rows) >= self._max_rows) or \
+                        (group.size >= self._max_bytes) or \
+                        (due_time <= now):
+                    due_keys.append(key)
+                elif (next_due is None) or (due_time < next_due):
+                    next_due = due_time
+
+            if due_keys or is_flushing:
+                return ([(key, self._groups.pop(key)) for key in due_keys], flush_generation)
+
+            self._condition.wait(None if next_due is None else next_due - now)
+
+    def _run(self) -> None:
+        """
+        Uploads the due groups until the batcher is closed and all rows are uploaded.
+        """
+        try:
+            while True:
+                with self._condition:
+                    due_groups, flush_generation = self._take_due_groups()
+                    is_closed = self._is_closed
+
+                for (database, table), group in due_groups:
+                    self._upload(database, table, group.rows)
+
+                with self._condition:
+                    self._pending_rows -= sum(len(group.rows) for _, group in due_groups)
+                    self._flush_done = max(self._flush_done, flush_generation)
+                    self._condition.notify_all()
+
+                    if is_closed and not self._groups:
+                        break
+        finally:
+            # Wake up the waiting threads, so they do not wait for this thread forever.
+            with self._condition:
+                self._is_stopped = True
+                self._condition.notify_all()
+
+    def _upload(self, database: int, table: str, rows: list) -> None:
+        """
+        Uploads the rows of one group with a single request.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            rows (list): The rows of the group.
+        """
+        try:
+            ret_code, ret_data = self._client.upload_rows(database,
+                                                          table,
+                                                          rows,
+                                                          column_dates=self._column_dates,
+                                                          ledger=self._ledger)
+        except Exception as e:  # pylint: disable=broad-except
+            ret_code, ret_data = (0, ResponseData(data={"message": str(e)}))
+
+        if ret_data.get("message") == "OK":
+            LOG.info("Uploaded %d rows to table %s.", len(rows), table)
+            self.uploaded_rows += len(rows)
+        else:
+            LOG.error("Upload of %d rows to table %s failed: [%d] %s",
+                      len(rows), table, ret_code, ret_data.get("message"))
+            self.failed_rows += len(rows)
+
+            if self._on_failure is not None:
+                try:
+                    self._on_failure(database, table, rows, ret_code, ret_data)
+                except Exception as e:  # pylint: disable=broad-except
+                    LOG.error("Exception in failure callback: %s", e)
+
+################################################################################
+# Functions
+################################################################################
+
+################################################################################
+# Main
+################################################################################
@@ -33,13 +33,21 @@
 # Imports
 ################################################################################
 
-import os
 import argparse
-import logging
+import hashlib
 import json
-import pandas as pd
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
 from pySupersetCli.ret import Ret
-from pySupersetCli.superset import Superset
+from pySupersetCli.ledger import DEFAULT_LEDGER_PATH, UploadLedger, get_ledger
+from pySupersetCli import json_codec
+
+# The client and the pipeline are imported by the functions using them,
+# so a command forwarded to the agent does not import them.
+if TYPE_CHECKING:
+    from pySupersetCli.superset import Superset
 
 ################################################################################
 # Variables
@@ -47,9 +55,15 @@ from pySupersetCli.superset import Superset
 
 LOG: logging.Logger = logging.getLogger(__name__)
 _CMD_NAME = "upload"
-_TEMP_FILE_NAME = "./temp.csv"
 DATE_COLUMN = "date"
 
+# Environment variable with the default path of the credentials file of the targets.
+TARGET_CREDENTIALS_ENV = "PYSUPERSETCLI_TARGET_CREDENTIALS"
+
+# Logged in clients of the additional targets, kept for further calls in the agent.
+# They are stored by the digest of their login, so no password is kept as key.
+_TARGET_CLIENTS: dict = {}
+
 ################################################################################
 # Classes
 ################################################################################
@@ -98,14 +112,72 @@ def register(subparser) -> dict:
     required_subarguments.add_argument('-f',
                                        '--file',
                                        type=str,
+                                       nargs="+",
                                        metavar='<input_file>',
                                        required=True,
-                                       help="The JSON input file to upload.")
+                                       help="The JSON input file(s) to upload.")
+
+    sub_parser_search.add_argument('--jobs',
+                                   type=int,
+                                   metavar='<processes>',
+                                   default=None,
+                                   help="Number of processes parsing multiple input files. " +
+                                   "Default: Number of CPUs.")
+
+    sub_parser_search.add_argument('--uploads',
+                                   type=int,
+                                   metavar='<uploads>',
+                                   default=4,
+                                   help="Number of concurrent uploads of multiple input files " +
+                                   "per server. Default: 4")
+
+    sub_parser_search.add_argument('--flatten',
+                                   action="store_true",
+                                   help="Flatten nested JSON objects and arrays into columns " +
+                                   "named by the path of keys, e.g. 'parent.child.0'.")
+
+    sub_parser_search.add_argument('--max_depth',
+                                   type=int,
+                                   metavar='<depth>',
+                                   default=None,
+                                   help="Number of nesting levels to flatten. Deeper values are " +
+                                   "uploaded as JSON text. Default: All levels.")
+
+    sub_parser_search.add_argument('--dedup',
+                                   action="store_true",
+                                   help="Skip data already uploaded to the same server, " +
+                                   "database and table, e.g. when retrying after a timeout.")
+
+    sub_parser_search.add_argument('--dedup_file',
+                                   type=str,
+                                   metavar='<ledger_file>',
+                                   default=DEFAULT_LEDGER_PATH,
+                                   help="The file the fingerprints of the uploaded data are " +
+                                   "kept in. Default: " + DEFAULT_LEDGER_PATH)
+
+    sub_parser_search.add_argument('--target',
+                                   type=str,
+                                   action="append",
+                                   dest="targets",
+                                   default=[],
+                                   metavar='<server_url>',
+                                   help="Additional Superset server to upload the same data to. " +
+                                   "Can be given multiple times. The user and password are " +
+                                   "taken from the file given with --target_credentials.")
+
+    sub_parser_search.add_argument('--target_credentials',
+                                   type=str,
+                                   metavar='<credentials_file>',
+                                   default=os.environ.get(TARGET_CREDENTIALS_ENV),
+                                   help="JSON file with the user and password of each target, " +
+                                   'e.g. {"<server_url>": {"user": "<user>", "password": ' +
+                                   '"<password>"}}. Default: The file given by the ' +
+                                   TARGET_CREDENTIALS_ENV + " environment variable.")
 
     return cmd_dict
 
 
-def _execute(args, superset_client: Superset) -> Ret:
+def _execute(args, superset_client: "Superset") -> Ret:
     """ This function serves as entry point for the command.
         It will be stored as callback for this module's subparser command.
 
@@ -119,47 +191,19 @@ def _execute(args, superset_client: Superset) -> Ret:
 
     return_status = Ret.OK
 
-    if ("" != args.table) and ("" != args.file) and (None is not superset_client):
+    if ("" != args.table) and ([] != args.file) and (None is not superset_client):
         try:
-            if args.file.endswith(".json") is False:
-                raise ValueError(
-                    "Invalid file format. Please provide a JSON file.")
-
-            with open(args.file, encoding="utf-8") as json_file:
-                data_dict = json.load(json_file)
-
-                if DATE_COLUMN not in data_dict:
-                    raise ValueError(
-                        "No 'date' column found in the JSON file.")
-
-            # Pack the JSON data into a Pandas DataFrame.
-            data_frame = pd.DataFrame([data_dict])
-
-            # Write the DataFrame to a temporary CSV file.
-            data_frame.to_csv(_TEMP_FILE_NAME, encoding="UTF-8", index=False)
-
-            with open(_TEMP_FILE_NAME, 'rb') as csv_file:
-                upload_file = {'file': csv_file}
-                upload_body = {'already_exists': 'append',
-                               'column_dates': [DATE_COLUMN],
-                               'table_name': args.table}
-
-                # Upload the CSV file to the specified table
-                ret_code, ret_data = \
-                    superset_client.request("POST",
-                                            f"/database/{args.database}/csv_upload/",
-                                            data=upload_body,
-                                            files=upload_file)
-
-            if ret_data.get("message") == "OK":
-                LOG.info("Upload successful.")
+            targets = _login_targets(args)
+            clients = [superset_client] + [client for client in targets if client is not None]
+
+            if len(args.file) == 1:
+                return_status = _upload_file(args, clients)
             else:
-                LOG.error("Upload failed: [%d] %s",
-                          ret_code, ret_data.get("message"))
-                return_status = Ret.ERROR_UPLOAD_FAILED
+                return_status = _upload_files(args, clients)
 
-            if os.path.exists(_TEMP_FILE_NAME):
-                os.remove(_TEMP_FILE_NAME)
+            # The data was uploaded to the other servers nevertheless.
+            if (Ret.OK == return_status) and (None in targets):
+                return_status = Ret.ERROR_LOGIN
 
         except Exception as e:  # pylint: disable=broad-except
             LOG.error("Exception: %s", e)
@@ -167,6 +211,200 @@ def _execute(args, superset_client: Superset) -> Ret:
 
     return return_status
 
+
+def _login_targets(args) -> list:
+    """ Log in to the additional target servers concurrently.
+        The clients are reused by further calls in the same process.
+
+    Args:
+        args (obj): The command line arguments.
+
+    Returns:
+        list: The Superset clients of the additional targets. None for failed logins.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from pySupersetCli.superset import Superset
+
+    provider = Superset.Provider.DB if args.basic_auth else Superset.Provider.LDAP
+    credentials = _load_target_credentials(args)
+    logins = {}
+
+    for server_url in args.targets:
+        user, password = credentials[server_url]
+        login_args = (server_url, user, password, provider, not args.no_ssl)
+        digest = hashlib.sha256(json.dumps(login_args).encode("utf-8")).hexdigest()
+        logins[digest] = login_args
+
+    digests = list(logins)
+    new_digests = [digest for digest in digests if digest not in _TARGET_CLIENTS]
+
+    def login(digest: str) -> Optional[Superset]:
+        server_url, user, password, key_provider, key_verify_ssl = logins[digest]
+        client = None
+
+        try:
+            client = Superset(server_url, user, password, key_provider, verify_ssl=key_verify_ssl)
+        except RuntimeError as e:
+            LOG.error("Failed to create Superset client for %s: %s", server_url, e)
+
+        return client
+
+    with ThreadPoolExecutor(max_workers=max(len(new_digests), 1)) as executor:
+        for digest, client in zip(new_digests, executor.map(login, new_digests)):
+            if client is not None:
+                _TARGET_CLIENTS[digest] = client
+
+    return [_TARGET_CLIENTS.get(digest) for digest in digests]
+
+
+def _load_target_credentials(args) -> dict:
+    """ Load the user and password of each target from the credentials file.
+        They are not given on the command line, where other users could see them.
+
+    Args:
+        args (obj): The command line arguments.
+
+    Returns:
+        dict: The user and password of each target, by server URL.
+
+    Raises:
+        ValueError: The credentials of a target are not available.
+    """
+    credentials: dict = {}
+
+    if args.targets:
+        if args.target_credentials is None:
+            raise ValueError("The credentials of the targets are required, " +
+                             "see --target_credentials.")
+
+        target_credentials = json_codec.load_file(args.target_credentials)
+
+        for server_url in args.targets:
+            entry = target_credentials.get(server_url) \
+                if isinstance(target_credentials, dict) else None
+
+            if (not isinstance(entry, dict)) or ("user" not in entry) or ("password" not in entry):
+                raise ValueError(f"No user and password for {server_url} in " +
+                                 f"{args.target_credentials}.")
+
+            credentials[server_url] = (entry["user"], entry["password"])
+
+    return credentials
+
+
+def _get_ledger(args) -> Optional[UploadLedger]:
+    """ Get the ledger of the uploaded data, if deduplication is requested.
+
+    Args:
+        args (obj): The command line arguments.
+
+    Returns:
+        Optional[UploadLedger]: The ledger or None without deduplication.
+    """
+    return get_ledger(args.dedup_file) if args.dedup else None
+
+
+def _upload_file(args, clients: list) -> Ret:
+    """ Upload the rows of a single input file with one request per server.
+        The rows are encoded once for all servers.
+
+    Args:
+        args (obj): The command line arguments.
+        clients (list): The Superset clients of all servers.
+
+    Returns:
+        Ret: The status of the upload.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from pySupersetCli.pipeline import encode_rows, load_rows, upload_csv_to_all
+
+    return_status = Ret.OK
+    rows = load_rows(args.file[0], [DATE_COLUMN])
+    csv_data = encode_rows(rows,
+                           args.flatten,
+                           args.max_depth,
+                           (args.database, args.table))
+
+    # Upload the JSON objects as new rows of the specified table.
+    results = upload_csv_to_all(clients,
+                                args.database,
+                                args.table,
+                                csv_data,
+                                column_dates=[DATE_COLUMN],
+                                ledger=_get_ledger(args))
+
+    for client, (ret_code, ret_data) in zip(clients, results):
+        if ret_data.get("skipped") is True:
+            LOG.info("Upload to %s skipped, the data was already uploaded.", client.server_url)
+        elif ret_data.get("message") == "OK":
+            LOG.info("Upload to %s successful.", client.server_url)
+        elif "errors" in ret_data:
+            LOG.error("Data does not match table %s on %s, nothing was uploaded:",
+                      args.table, client.server_url)
+            for error in ret_data["errors"]:
+                LOG.error("* %s", error)
+            return_status = Ret.ERROR_SCHEMA_MISMATCH
+        else:
+            LOG.error("Upload to %s failed: [%d] %s",
+                      client.server_url, ret_code, ret_data.get("message"))
+            if Ret.OK == return_status:
+                return_status = Ret.ERROR_UPLOAD_FAILED
+
+    return return_status
+
+
+def _upload_files(args, clients: list) -> Ret:
+    """ Upload multiple input files, parsing them in parallel to the uploads.
+
+    Args:
+        args (obj): The command line arguments.
+        clients (list): The Superset clients of all servers.
+
+    Returns:
+        Ret: The status of the upload.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from pySupersetCli.pipeline import UploadPipeline
+
+    return_status = Ret.OK
+    pipeline = UploadPipeline(clients,
+                              args.database,
+                              args.table,
+                              column_dates=[DATE_COLUMN],
+                              processes=args.jobs,
+                              uploaders=args.uploads,
+                              flatten=args.flatten,
+                              max_depth=args.max_depth,
+                              ledger=_get_ledger(args))
+
+    pipeline.run(args.file)
+
+    if pipeline.stats.parse_failed_chunks > 0:
+        return_status = Ret.ERROR_UPLOAD_FAILED
+        LOG.error("Parsing of %d chunks failed, they were not uploaded.",
+                  pipeline.stats.parse_failed_chunks)
+
+    # Every parsed chunk is uploaded to every server.
+    for server_url, server in pipeline.stats.servers.items():
+        if server.schema_errors:
+            LOG.error("Data does not match table %s on %s, %d of %d chunks were not uploaded:",
+                      args.table, server_url, server.failed_chunks, pipeline.stats.parse.chunks)
+            for error in server.schema_errors:
+                LOG.error("* %s", error)
+            return_status = Ret.ERROR_SCHEMA_MISMATCH
+        elif server.failed_chunks > 0:
+            LOG.error("Upload to %s failed for %d of %d chunks.",
+                      server_url, server.failed_chunks, pipeline.stats.parse.chunks)
+            if Ret.OK == return_status:
+                return_status = Ret.ERROR_UPLOAD_FAILED
+        elif server.skipped_chunks > 0:
+            LOG.info("Upload to %s successful, %d of %d chunks were already uploaded.",
+                     server_url, server.skipped_chunks, pipeline.stats.parse.chunks)
+        else:
+            LOG.info("Upload to %s successful.", server_url)
+
+    return return_status
+
 ################################################################################
 # Main
 ################################################################################
@@ -0,0 +1,219 @@
+"""Flattening of nested JSON objects and arrays into columns."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+import json
+import threading
+from typing import Optional
+import pandas as pd
+
+################################################################################
+# Variables
+################################################################################
+
+# Flatteners of the current process, by maximum depth.
+_FLATTENERS: dict = {}
+_FLATTENERS_LOCK = threading.Lock()
+
+################################################################################
+# Classes
+################################################################################
+
+
+class Flattener:  # pylint: disable=too-few-public-methods
+    """
+    Flattens nested JSON objects and arrays of whole batches of rows into columns.
+    Nested columns are named by the path of keys and array indices, joined by the separator,
+    e.g. {"a": {"b": [1, 2]}} results in the columns "a.b.0" and "a.b.1".
+
+    The flattening works column by column over the whole batch instead of row by row.
+    The columns derived for a table are cached, so further batches of the same table
+    skip the check for nested values in the columns known to be plain and keep the column order.
+    """
+
+    def __init__(self, max_depth: Optional[int] = None, separator: str = ".") -> None:
+        """
+        Initializes the flattener.
+
+        Args:
+            max_depth (Optional[int]): Number of nesting levels to flatten. Deeper values
+                are written as JSON text. Flattens all levels if None.
+            separator (str): Separator of the keys in the column names.
+        """
+        self._max_depth: Optional[int] = max_depth
+        self._separator: str = separator
+        self._schemas: dict = {}
+        self._lock = threading.Lock()
+
+    def flatten(self, rows: list, key: Optional[tuple] = None) -> pd.DataFrame:
+        """
+        Flattens a batch of rows.
+
+        Args:
+            rows (list): The rows as dictionaries, in which the keys are the columns.
+            key (Optional[tuple]): Identifies the table of the rows, e.g. (database, table),
+                to cache its columns. Nothing is cached if None.
+
+        Returns:
+            pd.DataFrame: The flattened rows.
+        """
+        with self._lock:
+            cached_columns, nested_columns = self._schemas.get(key, ([], None))
+
+        # Columns not seen so far may contain nested values, whatever the earlier batches had.
+        plain_columns = set(cached_columns) - (nested_columns or set())
+
+        frame = pd.DataFrame(rows, dtype=object)
+        columns: dict = {}
+        expanded: set = set()
+
+        for column in frame.columns:
+            self._flatten_column(str(column), frame[column], 0,
+                                 nested_columns=nested_columns,
+                                 plain_columns=plain_columns,
+                                 columns=columns,
+                                 expanded=expanded)
+
+        # Keep all cached columns in their order. Columns not seen so far are appended.
+        order = cached_columns + [column for column in columns if column not in cached_columns]
+
+        if key is not None:
+            with self._lock:
+                self._schemas[key] = (order, (nested_columns or set()) | expanded)
+
+        return pd.DataFrame(columns, index=frame.index, dtype=object).reindex(columns=order)
+
+    # pylint: disable=too-many-arguments
+    def _flatten_column(self,
+                        name: str,
+                        values: pd.Series,
+                        level: int,
+                        *,
+                        nested_columns: Optional[set],
+                        plain_columns: set,
+                        columns: dict,
+                        expanded: set) -> None:
+        """
+        Flattens one column and adds the resulting columns.
+
+        Args:
+            name (str): The name of the column.
+            values (pd.Series): The values of the column.
+            level (int): The nesting level of the column.
+            nested_columns (Optional[set]): Cached columns known to contain nested values.
+            plain_columns (set): Cached columns known to contain plain values only.
+                They are not checked for nested values.
+            columns (dict): The resulting columns by name.
+            expanded (set): The names of the columns which contained nested values.
+        """
+        is_candidate = name not in plain_columns
+        is_nested = values.map(_is_nested)
+
+        if (not is_candidate) or \
+                ((self._max_depth is not None) and (level >= self._max_depth)) or \
+                (not is_nested.any()):
+            # A column expanded before and empty in this batch is restored by the cached order.
+            if (nested_columns is None) or (name not in nested_columns) or values.notna().any():
+                # Values below the maximum depth are kept as JSON text.
+                columns[name] = values.where(~is_nested, values[is_nested].map(json.dumps))
+            return
+
+        expanded.add(name)
+        children = pd.DataFrame(values[is_nested].map(_as_mapping).tolist(),
+                                index=values.index[is_nested],
+                                dtype=object).reindex(values.index)
+
+        # Plain values next to nested ones stay in the column itself.
+        plain_values = values.where(~is_nested)
+
+        if plain_values.notna().any():
+            columns[name] = plain_values
+
+        for child in children.columns:
+            self._flatten_column(f"{name}{self._separator}{child}",
+                                 children[child],
+                                 level + 1,
+                                 nested_columns=nested_columns,
+                                 plain_columns=plain_columns,
+                                 columns=columns,
+                                 expanded=expanded)
+
+################################################################################
+# Functions
+################################################################################
+
+
+def get_flattener(max_depth: Optional[int] = None) -> Flattener:
+    """
+    Returns the flattener of the current process for the maximum depth.
+    Its column cache is shared by all batches of the process.
+
+    Args:
+        max_depth (Optional[int]): Number of nesting levels to flatten. All levels if None.
+
+    Returns:
+        Flattener: The shared flattener.
+    """
+    with _FLATTENERS_LOCK:
+        return _FLATTENERS.setdefault(max_depth, Flattener(max_depth))
+
+
+def _is_nested(value) -> bool:
+    """
+    Checks whether a value is a JSON object or array.
+
+    Args:
+        value (obj): The value.
+
+    Returns:
+        bool: True if the value is nested, otherwise False.
+    """
+    return isinstance(value, (dict, list))
+
+
+def _as_mapping(value) -> dict:
+    """
+    Returns the items of a JSON object or array by key or index.
+
+    Args:
+        value (Union[dict, list]): The nested value.
+
+    Returns:
+        dict: The items of the value.
+    """
+    return value if isinstance(value, dict) else dict(enumerate(value))
+
+################################################################################
+# Main
+################################################################################
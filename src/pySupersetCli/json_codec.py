@@ -0,0 +1,136 @@
+"""JSON decoding with an optional fast or pluggable backend."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # pylint: disable=invalid-name
+
+################################################################################
+# Variables
+################################################################################
+
+# Name of the JSON backend in use.
+BACKEND = "stdlib" if orjson is None else "orjson"
+
+# Decoding function plugged in by set_backend, used instead of the default backend.
+_CUSTOM_LOADS: Optional[Callable] = None
+
+################################################################################
+# Classes
+################################################################################
+
+################################################################################
+# Functions
+################################################################################
+
+
+def set_backend(name: str, custom_loads: Optional[Callable] = None) -> None:
+    """
+    Selects the JSON backend of all decoding in the current process.
+
+    Args:
+        name (str): "stdlib", "orjson" or the name of the custom backend.
+        custom_loads (Optional[Callable]): Decodes bytes or str, e.g. ujson.loads.
+            Required for a custom backend, raising ValueError for invalid documents.
+
+    Raises:
+        ValueError: The backend is not available.
+    """
+    global BACKEND, _CUSTOM_LOADS  # pylint: disable=global-statement
+
+    if custom_loads is None:
+        if (name not in ("stdlib", "orjson")) or ((name == "orjson") and (orjson is None)):
+            raise ValueError(f"JSON backend '{name}' is not available.")
+
+    BACKEND = name
+    _CUSTOM_LOADS = custom_loads
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decodes JSON data with the selected backend, by default orjson if it is installed.
+    Documents the backend rejects, e.g. orjson with NaN or integers beyond 64 bit,
+    are decoded by the standard library as before.
+
+    Args:
+        data (Union[bytes, str]): The JSON document.
+
+    Returns:
+        Any: The decoded document.
+
+    Raises:
+        ValueError: The data is not valid JSON.
+    """
+    decoded: Any = None
+
+    if _CUSTOM_LOADS is not None:
+        try:
+            decoded = _CUSTOM_LOADS(data)
+        except ValueError:
+            decoded = json.loads(data)
+    elif BACKEND == "orjson":
+        try:
+            decoded = orjson.loads(data)  # pylint: disable=no-member
+        except orjson.JSONDecodeError:  # pylint: disable=no-member
+            decoded = json.loads(data)
+    else:
+        decoded = json.loads(data)
+
+    return decoded
+
+
+def load_file(path: str) -> Any:
+    """
+    Decodes a JSON file.
+
+    Args:
+        path (str): The path of the JSON file.
+
+    Returns:
+        Any: The decoded document.
+
+    Raises:
+        ValueError: The file is not valid JSON.
+    """
+    with open(path, "rb") as json_file:
+        return loads(json_file.read())
+
+################################################################################
+# Main
+################################################################################
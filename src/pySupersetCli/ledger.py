@@ -0,0 +1,364 @@
+"""Fingerprint index of acknowledged uploads to skip duplicates."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+    msvcrt = None  # pylint: disable=invalid-name
+except ImportError:
+    fcntl = None  # pylint: disable=invalid-name
+    import msvcrt  # pylint: disable=import-error
+
+################################################################################
+# Variables
+################################################################################
+
+LOG: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join(os.path.expanduser("~"), ".pySupersetCli", "upload_ledger.txt")
+
+# Ledgers of the current process, by file path.
+_LEDGERS: dict = {}
+_LEDGERS_LOCK = threading.Lock()
+
+_SEPARATOR = "\t"
+
+################################################################################
+# Classes
+################################################################################
+
+
+class UploadLedger:  # pylint: disable=too-many-instance-attributes
+    """
+    Index of the fingerprints of the data already uploaded, by server, database and table.
+    Uploads with a known fingerprint are skipped, so retrying after an ambiguous
+    failure does not append the same rows twice. Only uploads acknowledged by
+    the server are recorded.
+
+    The index is kept in memory and, if a path is given, appended to a file shared
+    by all calls. Each table keeps at most max_entries fingerprints for at most
+    max_age seconds. The oldest fingerprints are evicted first.
+
+    Other processes may use the same file. The fingerprints they append are read
+    before each check, and the file is only written while holding a file lock.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_entries: int = 10000,
+                 max_age: float = 7 * 24 * 60 * 60) -> None:
+        """
+        Initializes the ledger and loads the recorded fingerprints.
+
+        Args:
+            path (Optional[str]): The file the fingerprints are kept in. Memory only if None.
+            max_entries (int): Maximum number of fingerprints per table.
+            max_age (float): Seconds after which a fingerprint is evicted.
+        """
+        self._path: Optional[str] = path
+        self._max_entries: int = max_entries
+        self._max_age: float = max_age
+        self._entries: dict = {}
+        self._file_lines: int = 0
+        # Identity of the file and the number of bytes read from it.
+        self._file_id: Optional[tuple] = None
+        self._file_offset: int = 0
+        self._lock = threading.Lock()
+
+        if (self._path is not None) and os.path.exists(self._path):
+            self._load()
+
+    @staticmethod
+    def fingerprint(data: bytes) -> str:
+        """
+        Calculates the fingerprint of the data of an upload.
+
+        Args:
+            data (bytes): The uploaded data.
+
+        Returns:
+            str: The fingerprint.
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def contains(self, server: str, database: int, table: str, fingerprint: str) -> bool:
+        """
+        Checks whether data with the fingerprint was already uploaded to the table.
+
+        Args:
+            server (str): The URL of the Superset server.
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            fingerprint (str): The fingerprint of the data.
+
+        Returns:
+            bool: True if the upload was acknowledged before, otherwise False.
+        """
+        with self._lock:
+            if self._path is not None:
+                self._read_new_lines()
+
+            entries = self._entries.get(_key(server, database, table))
+            timestamp = None if entries is None else entries.get(fingerprint)
+
+            return (timestamp is not None) and (time.time() - timestamp < self._max_age)
+
+    def add(self, server: str, database: int, table: str, fingerprint: str) -> None:
+        """
+        Records an upload acknowledged by the server.
+
+        Args:
+            server (str): The URL of the Superset server.
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            fingerprint (str): The fingerprint of the data.
+        """
+        key = _key(server, database, table)
+        timestamp = time.time()
+
+        with self._lock:
+            if self._path is not None:
+                self._append(key, fingerprint, timestamp)
+
+            # Also kept in memory if the file could not be written.
+            self._insert(key, fingerprint, timestamp)
+
+    def _insert(self, key: str, fingerprint: str, timestamp: float) -> None:
+        """
+        Inserts a fingerprint in memory and evicts the outdated ones of the table.
+
+        Args:
+            key (str): The key of the server, database and table.
+            fingerprint (str): The fingerprint of the data.
+            timestamp (float): The time of the upload.
+        """
+        entries = self._entries.setdefault(key, OrderedDict())
+        entries.pop(fingerprint, None)
+        entries[fingerprint] = timestamp
+
+        oldest_allowed = time.time() - self._max_age
+
+        while entries and \
+                ((len(entries) > self._max_entries) or
+                 (next(iter(entries.values())) < oldest_allowed)):
+            entries.popitem(last=False)
+
+    def _load(self) -> None:
+        """
+        Loads the fingerprints from the file and compacts it if it holds evicted ones.
+        """
+        try:
+            with _file_lock(self._path):
+                self._read_new_lines()
+                self._compact_if_needed()
+        except OSError as e:
+            LOG.warning("Failed to load upload ledger %s: %s", self._path, e)
+
+    def _read_new_lines(self) -> None:
+        """
+        Reads the fingerprints appended to the file since the last read.
+        If the file was replaced by a compaction of another process, it is read again
+        from the start. Everything this ledger recorded is in the file as well.
+        """
+        try:
+            status = os.stat(self._path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            LOG.warning("Failed to read upload ledger %s: %s", self._path, e)
+            return
+
+        file_id = (status.st_dev, status.st_ino)
+
+        if (file_id != self._file_id) or (status.st_size < self._file_offset):
+            self._entries = {}
+            self._file_lines = 0
+            self._file_id = file_id
+            self._file_offset = 0
+
+        if status.st_size == self._file_offset:
+            return
+
+        try:
+            with open(self._path, "rb") as ledger_file:
+                ledger_file.seek(self._file_offset)
+                data = ledger_file.read()
+        except OSError as e:
+            LOG.warning("Failed to read upload ledger %s: %s", self._path, e)
+            return
+
+        # A line still being written by another process is read next time.
+        data = data[:data.rfind(b"\n") + 1]
+        self._file_offset += len(data)
+
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            self._file_lines += 1
+            fields = line.rsplit(_SEPARATOR, 2)
+
+            try:
+                self._insert(fields[0], fields[1], float(fields[2]))
+            except (IndexError, ValueError):
+                LOG.warning("Ignoring invalid line in upload ledger %s.", self._path)
+
+    def _append(self, key: str, fingerprint: str, timestamp: float) -> None:
+        """
+        Appends a fingerprint to the file.
+
+        Args:
+            key (str): The key of the server, database and table.
+            fingerprint (str): The fingerprint of the data.
+            timestamp (float): The time of the upload.
+        """
+        line = f"{key}{_SEPARATOR}{fingerprint}{_SEPARATOR}{timestamp}\n".encode("utf-8")
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+
+            with _file_lock(self._path):
+                # Take over the lines of other processes first, so the offset stays in sync.
+                self._read_new_lines()
+
+                with open(self._path, "ab") as ledger_file:
+                    ledger_file.write(line)
+
+                status = os.stat(self._path)
+                self._file_id = (status.st_dev, status.st_ino)
+                self._file_offset = status.st_size
+                self._file_lines += 1
+                self._insert(key, fingerprint, timestamp)
+                self._compact_if_needed()
+        except OSError as e:
+            LOG.warning("Failed to record upload in ledger %s: %s", self._path, e)
+
+    def _compact_if_needed(self) -> None:
+        """
+        Rewrites the file with the current fingerprints only,
+        once it holds twice as many lines as fingerprints are kept.
+        Must be called with the file lock held and all lines of the file read.
+        """
+        entry_count = sum(len(entries) for entries in self._entries.values())
+
+        if self._file_lines > 2 * max(entry_count, self._max_entries):
+            temp_path = f"{self._path}.tmp"
+
+            with open(temp_path, "w", encoding="utf-8", newline="\n") as ledger_file:
+                for key, entries in self._entries.items():
+                    for fingerprint, timestamp in entries.items():
+                        ledger_file.write(
+                            f"{key}{_SEPARATOR}{fingerprint}{_SEPARATOR}{timestamp}\n")
+
+            os.replace(temp_path, self._path)
+
+            status = os.stat(self._path)
+            self._file_id = (status.st_dev, status.st_ino)
+            self._file_offset = status.st_size
+            self._file_lines = entry_count
+
+################################################################################
+# Functions
+################################################################################
+
+
+def get_ledger(path: str = DEFAULT_LEDGER_PATH) -> UploadLedger:
+    """
+    Returns the ledger of the current process for the file.
+
+    Args:
+        path (str): The file the fingerprints are kept in.
+
+    Returns:
+        UploadLedger: The shared ledger.
+    """
+    with _LEDGERS_LOCK:
+        if path not in _LEDGERS:
+            _LEDGERS[path] = UploadLedger(path)
+
+        return _LEDGERS[path]
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """
+    Holds an exclusive lock of the ledger file across processes.
+    A separate lock file is used, as the ledger file is replaced on compaction.
+
+    Args:
+        path (str): The path of the ledger file.
+
+    Yields:
+        None: While the lock is held.
+    """
+    with open(f"{path}.lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _key(server: str, database: int, table: str) -> str:
+    """
+    Returns the key of the fingerprints of a table.
+
+    Args:
+        server (str): The URL of the Superset server.
+        database (int): The primary key of the database.
+        table (str): The name of the table.
+
+    Returns:
+        str: The key.
+    """
+    return f"{server}{_SEPARATOR}{database}{_SEPARATOR}{table}"
+
+################################################################################
+# Main
+################################################################################
@@ -0,0 +1,511 @@
+"""Multi-process parse and encode pipeline feeding concurrent uploads."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Optional, Union
+from pySupersetCli.superset import CSV_ENCODING, ResponseData, Superset, rows_to_csv
+from pySupersetCli.schema import SchemaError
+from pySupersetCli import json_codec
+from pySupersetCli.ledger import UploadLedger
+
+################################################################################
+# Variables
+################################################################################
+
+LOG: logging.Logger = logging.getLogger(__name__)
+
+# Marks the end of the chunks in the upload queue.
+_END_OF_CHUNKS = None
+
+################################################################################
+# Classes
+################################################################################
+
+
+@dataclass
+class StageStats:
+    """
+    Throughput of one pipeline stage.
+    The time is the sum of the busy time of all workers of the stage.
+    """
+    chunks: int = 0
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def log(self, name: str) -> None:
+        """
+        Logs the throughput of the stage.
+
+        Args:
+            name (str): The name of the stage.
+        """
+        rows_per_second = self.rows / self.seconds if self.seconds > 0 else 0.0
+        bytes_per_second = self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+        LOG.info("%s: %d chunks, %d rows, %d bytes in %.3f s (%.0f rows/s, %.0f bytes/s)",
+                 name, self.chunks, self.rows, self.bytes, self.seconds,
+                 rows_per_second, bytes_per_second)
+
+
+@dataclass
+class ServerStats:
+    """
+    Results of the uploads of the chunks to one server.
+    The schema errors are the mismatches of the chunks not matching the table.
+    """
+    uploaded_chunks: int = 0
+    skipped_chunks: int = 0
+    failed_chunks: int = 0
+    schema_errors: list = field(default_factory=list)
+
+
+@dataclass
+class PipelineStats:
+    """
+    Throughput of all pipeline stages, the results per server and the total duration.
+    """
+    parse: StageStats = field(default_factory=StageStats)
+    encode: StageStats = field(default_factory=StageStats)
+    upload: StageStats = field(default_factory=StageStats)
+    servers: dict = field(default_factory=dict)
+    parse_failed_chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def is_successful(self) -> bool:
+        """
+        True if all chunks were parsed and uploaded to all servers.
+        """
+        return (self.parse_failed_chunks == 0) and \
+            all(server.failed_chunks == 0 for server in self.servers.values())
+
+    def log(self) -> None:
+        """
+        Logs the throughput of all stages and the results per server.
+        """
+        self.parse.log("Parse")
+        self.encode.log("Encode")
+        self.upload.log("Upload")
+
+        for server_url, server in self.servers.items():
+            LOG.info("%s: %d chunks uploaded, %d skipped, %d failed.",
+                     server_url, server.uploaded_chunks, server.skipped_chunks,
+                     server.failed_chunks)
+
+        LOG.info("Pipeline: %d rows uploaded in %.3f s, %d chunks failed to parse.",
+                 self.upload.rows, self.seconds, self.parse_failed_chunks)
+
+
+@dataclass
+class _Chunk:
+    """
+    Upload-ready CSV data of several input files.
+    """
+    csv_data: bytes
+    rows: int
+    file_bytes: int
+    parse_seconds: float
+    encode_seconds: float
+
+
+class UploadPipeline:  # pylint: disable=too-few-public-methods
+    """
+    Uploads many JSON input files to one table, overlapping CPU and network time.
+    A process pool parses the files and encodes them into CSV chunks. A bounded
+    queue feeds the chunks to threads, which upload them concurrently.
+    With several Superset clients, each chunk is encoded once and uploaded to every server.
+    """
+
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+    def __init__(self,
+                 superset_client: Union[Superset, list],
+                 database: int,
+                 table: str,
+                 *,
+                 column_dates: Optional[list] = None,
+                 processes: Optional[int] = None,
+                 uploaders: int = 4,
+                 files_per_chunk: int = 100,
+                 queue_size: int = 8,
+                 flatten: bool = False,
+                 max_depth: Optional[int] = None,
+                 ledger: Optional[UploadLedger] = None) -> None:
+        """
+        Initializes the pipeline.
+
+        Args:
+            superset_client (Union[Superset, list]): The Superset client used for the uploads
+                or a list of clients of all servers to upload to.
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            column_dates (Optional[list]): The columns to be parsed as dates.
+                Every row must contain them.
+            processes (Optional[int]): Number of parse processes. Defaults to the number of CPUs.
+            uploaders (int): Number of concurrent uploads per server.
+            files_per_chunk (int): Number of input files encoded into one upload.
+            queue_size (int): Number of encoded chunks waiting for upload at most.
+            flatten (bool): Flatten nested JSON objects and arrays into columns.
+            max_depth (Optional[int]): Number of nesting levels to flatten. All levels if None.
+            ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+                Chunks already uploaded to a server are skipped.
+        """
+        self._clients: list = superset_client if isinstance(superset_client, list) \
+            else [superset_client]
+        self._database: int = database
+        self._table: str = table
+        self._column_dates: list = column_dates or []
+        self._processes: int = processes or os.cpu_count() or 1
+        self._uploaders: int = max(uploaders, 1) * len(self._clients)
+        self._files_per_chunk: int = max(files_per_chunk, 1)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._flatten: bool = flatten
+        self._max_depth: Optional[int] = max_depth
+        self._ledger: Optional[UploadLedger] = ledger
+        self._lock = threading.Lock()
+        self.stats: PipelineStats = PipelineStats(
+            servers={client.server_url: ServerStats() for client in self._clients})
+
+    def run(self, paths: list) -> bool:
+        """
+        Parses, encodes and uploads the input files.
+
+        Args:
+            paths (list): The paths of the JSON input files.
+
+        Returns:
+            bool: True if all files were uploaded to all servers, otherwise False.
+                The results per server are in the statistics.
+        """
+        start_time = time.perf_counter()
+        chunks = [paths[index:index + self._files_per_chunk]
+                  for index in range(0, len(paths), self._files_per_chunk)]
+        upload_threads = [threading.Thread(target=self._upload_worker,
+                                           name=f"UploadPipeline-{index}")
+                          for index in range(self._uploaders)]
+
+        for thread in upload_threads:
+            thread.start()
+
+        try:
+            self._parse(chunks)
+        finally:
+            for _ in upload_threads:
+                self._queue.put(_END_OF_CHUNKS)
+
+            for thread in upload_threads:
+                thread.join()
+
+        self.stats.seconds = time.perf_counter() - start_time
+        self.stats.log()
+
+        return self.stats.is_successful
+
+    def _parse(self, chunks: list) -> None:
+        """
+        Parses and encodes the chunks in the process pool and queues them for upload.
+        Only as many chunks are submitted as can wait in the queue, so parsing
+        slows down to the upload speed.
+
+        Args:
+            chunks (list): The paths of the input files of each chunk.
+        """
+        pending: set = set()
+        remaining = iter(chunks)
+
+        with ProcessPoolExecutor(max_workers=self._processes) as executor:
+            while True:
+                for paths in remaining:
+                    pending.add(executor.submit(_parse_and_encode,
+                                                paths,
+                                                self._column_dates,
+                                                flatten=self._flatten,
+                                                max_depth=self._max_depth,
+                                                key=(self._database, self._table)))
+
+                    if len(pending) >= self._processes + self._queue.maxsize:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    self._queue_chunk(future)
+
+    def _queue_chunk(self, future: Future) -> None:
+        """
+        Records the parse and encode statistics of a chunk and queues it for upload.
+
+        Args:
+            future (Future): The finished parse and encode job.
+        """
+        try:
+            chunk: _Chunk = future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            LOG.error("Parsing failed: %s", e)
+            with self._lock:
+                self.stats.parse_failed_chunks += 1
+        else:
+            with self._lock:
+                self.stats.parse.chunks += 1
+                self.stats.parse.rows += chunk.rows
+                self.stats.parse.bytes += chunk.file_bytes
+                self.stats.parse.seconds += chunk.parse_seconds
+                self.stats.encode.chunks += 1
+                self.stats.encode.rows += chunk.rows
+                self.stats.encode.bytes += len(chunk.csv_data)
+                self.stats.encode.seconds += chunk.encode_seconds
+
+            # Blocks while the uploads are behind.
+            for client in self._clients:
+                self._queue.put((chunk, client))
+
+    def _upload_worker(self) -> None:
+        """
+        Uploads queued chunks until the end of the chunks is reached.
+        """
+        while True:
+            item: Optional[tuple] = self._queue.get()
+
+            if item is _END_OF_CHUNKS:
+                break
+
+            chunk, client = item
+            start_time = time.perf_counter()
+
+            # A failed chunk must not stop the worker, as the queue would not be drained anymore.
+            try:
+                ret_code, ret_data = _upload_csv(client,
+                                                 self._database,
+                                                 self._table,
+                                                 chunk.csv_data,
+                                                 self._column_dates,
+                                                 ledger=self._ledger)
+            except Exception as e:  # pylint: disable=broad-except
+                ret_code, ret_data = (0, ResponseData(data={"message": str(e)}))
+
+            upload_seconds = time.perf_counter() - start_time
+
+            with self._lock:
+                server = self.stats.servers[client.server_url]
+
+                if ret_data.get("skipped") is True:
+                    server.skipped_chunks += 1
+                elif ret_data.get("message") == "OK":
+                    server.uploaded_chunks += 1
+                    self.stats.upload.chunks += 1
+                    self.stats.upload.rows += chunk.rows
+                    self.stats.upload.bytes += len(chunk.csv_data)
+                    self.stats.upload.seconds += upload_seconds
+                else:
+                    LOG.error("Upload of %d rows to %s failed: [%d] %s",
+                              chunk.rows, client.server_url, ret_code, ret_data.get("message"))
+                    server.failed_chunks += 1
+                    server.schema_errors.extend(ret_data.get("errors", []))
+
+################################################################################
+# Functions
+################################################################################
+
+
+def upload_csv_to_all(superset_clients: list,  # pylint: disable=too-many-arguments
+                      database: int,
+                      table: str,
+                      csv_data: bytes,
+                      column_dates: Optional[list] = None,
+                      *,
+                      ledger: Optional[UploadLedger] = None) -> list:
+    """
+    Uploads the same CSV data to several Superset servers concurrently.
+
+    Args:
+        superset_clients (list): The Superset clients of the servers.
+        database (int): The primary key of the database.
+        table (str): The name of the table.
+        csv_data (bytes): The CSV data including the header line.
+        column_dates (Optional[list]): The columns to be parsed as dates.
+        ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+
+    Returns:
+        list: The response code and the response data of each client, in the order of the clients.
+            If the data does not match the table of a server, the response data contains
+            the mismatches as "errors" and nothing is uploaded to this server.
+    """
+    with ThreadPoolExecutor(max_workers=max(len(superset_clients), 1)) as executor:
+        return list(executor.map(lambda client: _upload_csv(client,
+                                                            database,
+                                                            table,
+                                                            csv_data,
+                                                            column_dates,
+                                                            ledger=ledger),
+                                 superset_clients))
+
+
+def load_rows(path: str, required_columns: Optional[list] = None) -> list:
+    """
+    Loads the rows of a JSON input file.
+    The file contains either a single JSON object or a list of JSON objects.
+
+    Args:
+        path (str): The path of the JSON input file.
+        required_columns (Optional[list]): Columns every row must contain.
+
+    Returns:
+        list: The rows as dictionaries, in which the keys are the columns.
+    """
+    if path.endswith(".json") is False:
+        raise ValueError("Invalid file format. Please provide a JSON file.")
+
+    data = json_codec.load_file(path)
+    rows = data if isinstance(data, list) else [data]
+
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError(f"{path}: Each row must be a JSON object.")
+
+        for column in required_columns or []:
+            if column not in row:
+                raise ValueError(f"{path}: No '{column}' column found in the JSON file.")
+
+    return rows
+
+
+def _upload_csv(superset_client: Superset,  # pylint: disable=too-many-arguments
+                database: int,
+                table: str,
+                csv_data: bytes,
+                column_dates: Optional[list],
+                *,
+                ledger: Optional[UploadLedger] = None) -> tuple[int, ResponseData]:
+    """
+    Uploads CSV data and reports a mismatch with the table like a failed upload.
+
+    Args:
+        superset_client (Superset): The Superset client of the server.
+        database (int): The primary key of the database.
+        table (str): The name of the table.
+        csv_data (bytes): The CSV data including the header line.
+        column_dates (Optional[list]): The columns to be parsed as dates.
+        ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+
+    Returns:
+        tuple[int, ResponseData]: The response code and the response data.
+    """
+    try:
+        return superset_client.upload_csv(database, table, csv_data, column_dates, ledger=ledger)
+    except SchemaError as e:
+        return (0, ResponseData(data={"message": str(e), "errors": e.errors}))
+
+
+def encode_rows(rows: list,
+                flatten: bool = False,
+                max_depth: Optional[int] = None,
+                key: Optional[tuple] = None) -> bytes:
+    """
+    Encodes rows as CSV data for the upload, optionally flattening nested values.
+
+    Args:
+        rows (list): The rows as dictionaries, in which the keys are the columns.
+        flatten (bool): Flatten nested JSON objects and arrays into columns.
+        max_depth (Optional[int]): Number of nesting levels to flatten. All levels if None.
+        key (Optional[tuple]): Identifies the table to cache its flattened columns.
+
+    Returns:
+        bytes: The CSV data including the header line.
+    """
+    if flatten is False:
+        return rows_to_csv(rows)
+
+    if not rows:
+        raise ValueError("No rows to upload.")
+
+    # Pandas is only imported for flattening, as its import dominates the start of short calls.
+    from pySupersetCli.flatten import get_flattener  # pylint: disable=import-outside-toplevel
+
+    data_frame = get_flattener(max_depth).flatten(rows, key)
+
+    return data_frame.to_csv(index=False).encode(CSV_ENCODING)
+
+
+def _parse_and_encode(paths: list,
+                      required_columns: list,
+                      *,
+                      flatten: bool,
+                      max_depth: Optional[int],
+                      key: tuple) -> _Chunk:
+    """
+    Parses the input files and encodes their rows into one CSV chunk.
+    Runs in a process of the pool.
+
+    Args:
+        paths (list): The paths of the JSON input files.
+        required_columns (list): Columns every row must contain.
+        flatten (bool): Flatten nested JSON objects and arrays into columns.
+        max_depth (Optional[int]): Number of nesting levels to flatten. All levels if None.
+        key (tuple): Identifies the table to cache its flattened columns.
+
+    Returns:
+        _Chunk: The encoded chunk with its statistics.
+    """
+    start_time = time.perf_counter()
+    rows: list = []
+    file_bytes = 0
+
+    for path in paths:
+        rows.extend(load_rows(path, required_columns))
+        file_bytes += os.path.getsize(path)
+
+    parse_time = time.perf_counter()
+    csv_data = encode_rows(rows, flatten, max_depth, key)
+    encode_time = time.perf_counter()
+
+    return _Chunk(csv_data=csv_data,
+                  rows=len(rows),
+                  file_bytes=file_bytes,
+                  parse_seconds=parse_time - start_time,
+                  encode_seconds=encode_time - parse_time)
+
+################################################################################
+# Main
+################################################################################
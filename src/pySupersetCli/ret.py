@@ -50,6 +50,8 @@ class Ret(IntEnum):
     ERROR_ARGPARSE = 2  # Must be 2 to match the argparse error code.
     ERROR_INVALID_ARGUMENTS = 3
     ERROR_UPLOAD_FAILED = 4
+    ERROR_AGENT = 5
+    ERROR_SCHEMA_MISMATCH = 6
 
 ################################################################################
 # Functions
@@ -0,0 +1,191 @@
+"""Client-side validation of uploads against the columns of existing tables."""
+
+# BSD 3-Clause License
+#
+# Copyright (c) 2024 - 2026, NewTec GmbH
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICU5LAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+################################################################################
+# Imports
+################################################################################
+
+import csv
+import io
+from typing import Optional
+
+################################################################################
+# Variables
+################################################################################
+
+# Number of errors included in the message of a schema error.
+_MAX_REPORTED_ERRORS = 10
+
+################################################################################
+# Classes
+################################################################################
+
+
+class SchemaError(ValueError):
+    """
+    The data to upload does not match the columns of the existing table.
+    """
+
+    def __init__(self, table: str, errors: list) -> None:
+        """
+        Initializes the error.
+
+        Args:
+            table (str): The name of the table.
+            errors (list): Description of each mismatch.
+        """
+        self.table: str = table
+        self.errors: list = errors
+        reported = "; ".join(errors[:_MAX_REPORTED_ERRORS])
+
+        if len(errors) > _MAX_REPORTED_ERRORS:
+            reported += f"; and {len(errors) - _MAX_REPORTED_ERRORS} more"
+
+        super().__init__(f"Data does not match table '{table}': {reported}")
+
+################################################################################
+# Functions
+################################################################################
+
+
+def validate_csv(csv_data: bytes,
+                 table_columns: list,
+                 column_dates: Optional[list] = None) -> list:
+    """
+    Checks CSV data against the columns of an existing table before it is uploaded.
+    All columns must exist in the table. Their order does not matter, see order_csv.
+    Columns of the table not contained in the data are left empty by the server.
+    The values of the date columns must be parseable as dates.
+
+    Args:
+        csv_data (bytes): The CSV data including the header line.
+        table_columns (list): The column names of the table in their order.
+        column_dates (Optional[list]): The columns to be parsed as dates.
+
+    Returns:
+        list: Description of each mismatch. Empty if the data matches the table.
+    """
+    errors: list = []
+    columns = _read_header(csv_data)
+    unknown_columns = [column for column in columns if column not in table_columns]
+
+    if unknown_columns:
+        errors.append(f"Unknown columns {unknown_columns}, "
+                      f"the table has the columns {table_columns}")
+
+    date_columns = [column for column in column_dates or [] if column in columns]
+
+    if date_columns:
+        errors.extend(_validate_dates(csv_data, date_columns))
+
+    return errors
+
+
+def order_csv(csv_data: bytes, table_columns: list) -> bytes:
+    """
+    Rewrites CSV data with its columns in the order of the table.
+    The rows are built from JSON objects, whose key order is arbitrary.
+    Columns unknown to the table are kept at the end.
+
+    Args:
+        csv_data (bytes): The CSV data including the header line.
+        table_columns (list): The column names of the table in their order.
+
+    Returns:
+        bytes: The CSV data in the order of the table. The data itself if already in order.
+    """
+    columns = _read_header(csv_data)
+    positions = {column: index for index, column in enumerate(table_columns)}
+    indices = sorted(range(len(columns)),
+                     key=lambda index: positions.get(columns[index], len(positions)))
+
+    if indices == list(range(len(columns))):
+        return csv_data
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    for row in csv.reader(io.StringIO(csv_data.decode("utf-8"), newline="")):
+        writer.writerow([row[index] if index < len(row) else "" for index in indices])
+
+    return buffer.getvalue().encode("utf-8")
+
+
+def _read_header(csv_data: bytes) -> list:
+    """
+    Reads the column names from the header line of CSV data.
+
+    Args:
+        csv_data (bytes): The CSV data including the header line.
+
+    Returns:
+        list: The column names.
+    """
+    header_line = csv_data.split(b"\n", 1)[0].decode("utf-8")
+
+    return next(csv.reader([header_line]), [])
+
+
+def _validate_dates(csv_data: bytes, date_columns: list) -> list:
+    """
+    Checks that all values of the date columns can be parsed as dates.
+    The columns are parsed as a whole, like the server does on upload.
+
+    Args:
+        csv_data (bytes): The CSV data including the header line.
+        date_columns (list): The columns to be parsed as dates.
+
+    Returns:
+        list: Description of each value which is not a date.
+    """
+    # Pandas is only imported for date columns, as its import dominates the start of short calls.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    errors: list = []
+    data_frame = pd.read_csv(io.BytesIO(csv_data),
+                             usecols=date_columns,
+                             dtype=str,
+                             keep_default_na=False)
+
+    for column in date_columns:
+        values = data_frame[column]
+        dates = pd.to_datetime(values, errors="coerce", format="mixed")
+        invalid = values[dates.isna() & (values != "")]
+
+        for index, value in invalid.items():
+            # Row 1 is the first row after the header line.
+            errors.append(f"Row {index + 1}: '{value}' in column '{column}' is not a date")
+
+    return errors
+
+################################################################################
+# Main
+################################################################################
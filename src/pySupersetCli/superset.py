@@ -33,10 +33,19 @@
 # Imports
 ################################################################################
 
+from collections.abc import Mapping
 from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+import csv
+import io
+import itertools
 import logging
+import threading
 import requests
 import urllib3
+from pySupersetCli.schema import SchemaError, order_csv, validate_csv
+from pySupersetCli import json_codec
+from pySupersetCli.ledger import UploadLedger
 
 
 ################################################################################
@@ -45,15 +54,89 @@ import urllib3
 
 LOG: logging.Logger = logging.getLogger(__name__)
 
+# Encoding of the CSV data uploaded to the server.
+CSV_ENCODING = "utf-8"
+
 ################################################################################
 # Classes
 ################################################################################
 
 
-class Superset:  # pylint: disable=too-few-public-methods
+class ResponseData(Mapping):
+    """
+    The JSON data of a response, decoded on the first access.
+    Callers only interested in the response code never decode the data.
+    Responses which are not JSON, e.g. exported files, are not decoded and
+    appear empty. Their raw content is available as content.
+
+    The data is read-only and no dict. Use dict(response_data) to modify it
+    or to pass it to json.dumps.
+    """
+
+    def __init__(self,
+                 response: Optional[requests.Response] = None,
+                 data: Optional[dict] = None) -> None:
+        """
+        Initializes the response data.
+
+        Args:
+            response (Optional[requests.Response]): The response. Empty data if None.
+            data (Optional[dict]): Data determined without a response, e.g. for skipped
+                or rejected uploads. Used instead of the response if given.
+        """
+        self._response: Optional[requests.Response] = response
+        self._data: Optional[dict] = None if data is None else dict(data)
+
+    @property
+    def content(self) -> bytes:
+        """
+        The raw content of the response.
+        """
+        return b"" if self._response is None else self._response.content
+
+    def _decoded(self) -> dict:
+        """
+        Decodes the JSON data of the response once.
+
+        Returns:
+            dict: The decoded data. Empty if the response is no JSON object.
+        """
+        if self._data is None:
+            data: dict = {}
+            content_type: str = "" if self._response is None else \
+                self._response.headers.get("Content-Type", "")
+
+            if "json" in content_type:
+                try:
+                    decoded = json_codec.loads(self._response.content)
+
+                    if isinstance(decoded, dict):
+                        data = decoded
+                except ValueError as e:
+                    LOG.error("JSON decode error: %s", e)
+
+            self._data = data
+
+        return self._data
+
+    def __getitem__(self, key: str):
+        return self._decoded()[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._decoded())
+
+    def __len__(self) -> int:
+        return len(self._decoded())
+
+    def __repr__(self) -> str:
+        return repr(self._decoded())
+
+
+class Superset:  # pylint: disable=too-few-public-methods, too-many-instance-attributes
     """
     Wrapper of the requests module for the Superset API.
     Handles the authentication and the API calls.
+    The requests may be sent from several threads at the same time.
     Implements parts of the Superset API: https://superset.apache.org/docs/api/
     """
 
@@ -82,19 +165,39 @@ class Superset:  # pylint: disable=too-few-public-methods
             provider (Provider): The authentication provider.
             verify_ssl (bool): Verify the SSL certificate of the server.
         """
+        self._base_url: str = server_url
         self._server_url: str = f"{server_url}/api/v1"
         self._access_token: str = ""
+        self._refresh_token: str = ""
         self._csrf_token: str = ""
         self._cookies: dict = {}
         self._timeout: int = 60
         self._verify_ssl: bool = verify_ssl
 
+        # Kept to log in again once the refresh token has expired as well.
+        self._credentials: tuple = (username, password, provider)
+        # Only one thread renews the tokens, the others use its result.
+        self._refresh_lock = threading.Lock()
+
+        # Keep the connections to the server alive between requests.
+        self._session: requests.Session = requests.Session()
+
+        # Column names of the existing tables, by database and table.
+        self._table_columns: dict = {}
+
         if not self._verify_ssl:
             # Disable SSL warnings if SSL verification is disabled
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
         # Login the user and retrieve the access token and the CSRF token
-        self._login(username, password, provider)
+        self._login(*self._credentials)
+
+    @property
+    def server_url(self) -> str:
+        """
+        The URL of the Superset server.
+        """
+        return self._base_url
 
     def _login(self, username: str, password: str, provider: Provider) -> None:
         """
@@ -118,9 +221,11 @@ class Superset:  # pylint: disable=too-few-public-methods
             "username": username
         }
 
-        # Send the login request
+        # Send the login request without the expired tokens of a previous login
         ret_code, response = self.request("POST",
                                           login_endpoint,
+                                          retry_on_expiry=False,
+                                          token="",
                                           json=login_body)
 
         if requests.codes.ok != ret_code:  # pylint: disable=no-member
@@ -128,6 +233,7 @@ class Superset:  # pylint: disable=too-few-public-methods
             raise RuntimeError("Login failed")
 
         self._access_token = response.get("access_token", "")
+        self._refresh_token = response.get("refresh_token", "")
 
         # Get the CSRF token
         ret_code, response = self.request("GET", crsf_token_endpoint)
@@ -142,10 +248,65 @@ class Superset:  # pylint: disable=too-few-public-methods
             LOG.fatal("Tokens failed: Access token or CSRF token not received.")
             raise RuntimeError("Tokens failed")
 
+    def _refresh(self, expired_token: str) -> bool:
+        """
+        Retrieves a new access token using the refresh token.
+        If the refresh token is rejected as well, the user is logged in again.
+        Nothing is requested if another thread already renewed the expired token.
+
+        Args:
+            expired_token (str): The access token the server reported as expired.
+
+        Returns:
+            bool: True if a new access token is available, otherwise False.
+        """
+        with self._refresh_lock:
+            if self._access_token != expired_token:
+                return True
+
+            return self._renew_tokens()
+
+    def _renew_tokens(self) -> bool:
+        """
+        Renews the access token with the refresh token or, if rejected, by logging in again.
+        Must be called with the refresh lock held.
+
+        Returns:
+            bool: True if a new access token was received, otherwise False.
+        """
+        refresh_endpoint: str = "/security/refresh"
+        is_refreshed: bool = False
+
+        if self._refresh_token != "":
+            # The refresh endpoint expects the refresh token instead of the access token.
+            # The access token is kept until the new one is received, as other threads may use it.
+            ret_code, response = self.request("POST",
+                                              refresh_endpoint,
+                                              retry_on_expiry=False,
+                                              token=self._refresh_token)
+            access_token: str = response.get("access_token", "")
+
+            if (requests.codes.ok == ret_code) and (access_token != ""):  # pylint: disable=no-member
+                self._access_token = access_token
+                is_refreshed = True
+            else:
+                LOG.warning("Refreshing token failed: %s", response.get("message"))
+
+        if is_refreshed is False:
+            try:
+                self._login(*self._credentials)
+                is_refreshed = True
+            except RuntimeError:
+                LOG.error("Login after token expiry failed.")
+
+        return is_refreshed
+
     def request(self,
                 method: str,
                 endpoint: str,
-                **request_kwargs) -> tuple[int, dict]:
+                retry_on_expiry: bool = True,
+                token: Optional[str] = None,
+                **request_kwargs) -> tuple[int, ResponseData]:
         """
         Sends a request to the Superset API.
 
@@ -153,29 +314,36 @@ class Superset:  # pylint: disable=too-few-public-methods
             method (str): The HTTP method of the request.
             endpoint (str): The endpoint of the request after '/api/v1'.
             data (dict): The data of the request.
+            retry_on_expiry (bool): Refresh the access token and repeat the request once
+                    if the server reports an expired token.
+            token (Optional[str]): The token for the authorization instead of the access token.
             request_kwargs (dict): Additional keyword arguments for the request. 
                     Can be any accepted by the Requests module.
 
         Returns:
-            tuple[int, dict]: The response code and the response data.
+            tuple[int, ResponseData]: The response code and the response data.
+                The response data is decoded on the first access.
         """
 
         url: str = f"{self._server_url}{endpoint}"
         headers: dict = {}
         response_code: int = 0
-        reponse_data: dict = {}
+        reponse_data: ResponseData = ResponseData()
+
+        if token is None:
+            token = self._access_token
 
         # If already logged in, add the access token to the headers
-        if self._access_token != "":
+        if token != "":
             headers = {
-                'Authorization': f'Bearer {self._access_token}',
+                'Authorization': f'Bearer {token}',
                 'referer': self._server_url,
                 'X-CSRFToken': self._csrf_token
             }
 
         try:
             # Send the request
-            response: requests.Response = requests.request(
+            response: requests.Response = self._session.request(
                 method=method,
                 url=url,
                 headers=headers,
@@ -186,7 +354,7 @@ class Superset:  # pylint: disable=too-few-public-methods
                 ** request_kwargs)
 
             response_code = response.status_code
-            reponse_data = response.json()
+            reponse_data = ResponseData(response)
 
             if response.cookies:
                 self._cookies = response.cookies.get_dict()
@@ -196,11 +364,13 @@ class Superset:  # pylint: disable=too-few-public-methods
 
             # Check if the token has expired
             if (requests.codes.unauthorized == response_code) and \
-                    (reponse_data.get('message') == "Token has expired"):  # pylint: disable=no-member
-                LOG.error("Refreshing token is not implemented.")
+                    ("Token has expired" in (reponse_data.get('msg'),
+                                             reponse_data.get('message'))):  # pylint: disable=no-member
+                if (retry_on_expiry is True) and (self._refresh(token) is True):
+                    LOG.info("Token refreshed. Repeating request.")
+                    return self.request(method, endpoint, False, **request_kwargs)
 
-        except requests.exceptions.JSONDecodeError as e:
-            LOG.error("JSON decode error: %s", e)
+                LOG.error("Token has expired.")
 
         except requests.exceptions.Timeout as e:
             LOG.error("Timeout error: %s", e)
@@ -216,11 +386,285 @@ class Superset:  # pylint: disable=too-few-public-methods
 
         return (response_code, reponse_data)
 
+    def get_table_columns(self,
+                          database: int,
+                          table: str,
+                          use_cache: bool = True) -> Optional[list]:
+        """
+        Retrieves the column names of an existing table.
+        The columns are cached, so each existing table is requested only once.
+        Tables without columns, e.g. not created yet, are requested again next time.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            use_cache (bool): Use the cached columns. If False, they are requested again.
+
+        Returns:
+            Optional[list]: The column names in the order of the table or
+                None if the table does not exist or its columns are not available.
+        """
+        key: tuple = (database, table)
+        table_columns: Optional[list] = self._table_columns.get(key) if use_cache else None
+
+        if table_columns is None:
+            ret_code, ret_data = self.request("GET",
+                                              f"/database/{database}/table_metadata/",
+                                              params={"name": table})
+            columns = ret_data.get("columns")
+
+            if (requests.codes.ok == ret_code) and isinstance(columns, list):  # pylint: disable=no-member
+                table_columns = [column.get("name") for column in columns]
+                self._table_columns[key] = table_columns
+            else:
+                LOG.info("Columns of table %s not available: [%d] %s",
+                         table, ret_code, ret_data.get("message"))
+
+        return table_columns
+
+    def upload_csv(self,
+                   database: int,
+                   table: str,
+                   csv_data: bytes,
+                   column_dates: Optional[list] = None,
+                   already_exists: str = "append",
+                   *,
+                   ledger: Optional[UploadLedger] = None) -> tuple[int, ResponseData]:
+        """
+        Uploads CSV data to a table of a database.
+        When appending to an existing table, the columns are written in the order of the table.
+        With a ledger, data already acknowledged by the server is not uploaded again.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            csv_data (bytes): The CSV data including the header line.
+            column_dates (Optional[list]): The columns to be parsed as dates.
+            already_exists (str): What to do if the table already exists:
+                "fail", "replace" or "append".
+            ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+
+        Returns:
+            tuple[int, ResponseData]: The response code and the response data.
+                The upload was successful if the response data contains the message "OK".
+                A skipped upload reports the message "OK" and "skipped".
+
+        Raises:
+            SchemaError: The data does not match the columns of the existing table.
+                Checked before the upload if rows are appended.
+        """
+        upload_body: dict = {'already_exists': already_exists,
+                             'column_dates': column_dates or [],
+                             'table_name': table}
+        fingerprint: str = ""
+
+        if (ledger is not None) and (already_exists == "append"):
+            fingerprint = ledger.fingerprint(csv_data)
+
+            if ledger.contains(self._base_url, database, table, fingerprint):
+                LOG.info("Skipping upload to table %s, the data was already uploaded.", table)
+                return (requests.codes.ok,  # pylint: disable=no-member
+                        ResponseData(data={"message": "OK", "skipped": True}))
+
+        if already_exists == "append":
+            csv_data = self._match_table(database, table, csv_data, column_dates)
+
+        upload_file: dict = {'file': (f"{table}.csv", csv_data, "text/csv")}
+        ret_code, ret_data = self.request("POST",
+                                          f"/database/{database}/csv_upload/",
+                                          data=upload_body,
+                                          files=upload_file)
+
+        # The table may have been changed meanwhile or replaced by this upload.
+        if (ret_data.get("message") != "OK") or (already_exists != "append"):
+            self._table_columns.pop((database, table), None)
+
+        if (ret_data.get("message") == "OK") and (fingerprint != ""):
+            ledger.add(self._base_url, database, table, fingerprint)
+
+        return (ret_code, ret_data)
+
+    def _match_table(self,
+                     database: int,
+                     table: str,
+                     csv_data: bytes,
+                     column_dates: Optional[list]) -> bytes:
+        """
+        Checks CSV data against the columns of the existing table and orders its columns.
+        On a mismatch, the columns are requested again, as the table may have been
+        changed since they were cached.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            csv_data (bytes): The CSV data including the header line.
+            column_dates (Optional[list]): The columns to be parsed as dates.
+
+        Returns:
+            bytes: The CSV data in the order of the table. Unchanged if its columns are unknown.
+
+        Raises:
+            SchemaError: The data does not match the columns of the table.
+        """
+        table_columns = self.get_table_columns(database, table)
+        errors = [] if table_columns is None else \
+            validate_csv(csv_data, table_columns, column_dates)
+
+        if errors:
+            table_columns = self.get_table_columns(database, table, use_cache=False)
+            errors = [] if table_columns is None else \
+                validate_csv(csv_data, table_columns, column_dates)
+
+        if errors:
+            raise SchemaError(table, errors)
+
+        return csv_data if table_columns is None else order_csv(csv_data, table_columns)
+
+    def upload_rows(self,
+                    database: int,
+                    table: str,
+                    rows: list,
+                    column_dates: Optional[list] = None,
+                    already_exists: str = "append",
+                    *,
+                    ledger: Optional[UploadLedger] = None) -> tuple[int, ResponseData]:
+        """
+        Uploads rows to a table of a database with a single request.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            rows (list): The rows as dictionaries, in which the keys are the columns.
+            column_dates (Optional[list]): The columns to be parsed as dates.
+            already_exists (str): What to do if the table already exists:
+                "fail", "replace" or "append".
+            ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+
+        Returns:
+            tuple[int, ResponseData]: The response code and the response data.
+        """
+        return self.upload_csv(database,
+                               table,
+                               rows_to_csv(rows),
+                               column_dates,
+                               already_exists,
+                               ledger=ledger)
+
+    def upload_dataframe(self,
+                         database: int,
+                         table: str,
+                         data_frame,
+                         column_dates: Optional[list] = None,
+                         already_exists: str = "append",
+                         *,
+                         ledger: Optional[UploadLedger] = None) -> tuple[int, ResponseData]:
+        """
+        Uploads a Pandas DataFrame to a table of a database with a single request.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            data_frame (pandas.DataFrame): The rows to upload. The index is not uploaded.
+            column_dates (Optional[list]): The columns to be parsed as dates.
+            already_exists (str): What to do if the table already exists:
+                "fail", "replace" or "append".
+            ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+
+        Returns:
+            tuple[int, ResponseData]: The response code and the response data.
+        """
+        csv_data: bytes = data_frame.to_csv(index=False).encode(CSV_ENCODING)
+
+        return self.upload_csv(database,
+                               table,
+                               csv_data,
+                               column_dates,
+                               already_exists,
+                               ledger=ledger)
+
+    def upload_iterable(self,
+                        database: int,
+                        table: str,
+                        rows: Iterable[dict],
+                        column_dates: Optional[list] = None,
+                        chunk_size: int = 10000,
+                        *,
+                        ledger: Optional[UploadLedger] = None) -> tuple[int, ResponseData]:
+        """
+        Uploads the rows of an iterable, e.g. a generator, to an existing or new table.
+        The rows are appended in chunks, so the iterable is never held in memory completely.
+        The upload stops at the first failed chunk.
+
+        Args:
+            database (int): The primary key of the database.
+            table (str): The name of the table.
+            rows (Iterable[dict]): The rows as dictionaries, in which the keys are the columns.
+            column_dates (Optional[list]): The columns to be parsed as dates.
+            chunk_size (int): The maximum number of rows per request.
+            ledger (Optional[UploadLedger]): Index of the uploads already acknowledged.
+
+        Returns:
+            tuple[int, ResponseData]: The response code and the response data of the last request.
+        """
+        ret_code: int = 0
+        ret_data: ResponseData = ResponseData()
+        iterator = iter(rows)
+
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be at least 1.")
+
+        chunk = list(itertools.islice(iterator, chunk_size))
+
+        while chunk:
+            ret_code, ret_data = self.upload_rows(database,
+                                                  table,
+                                                  chunk,
+                                                  column_dates,
+                                                  ledger=ledger)
+
+            if ret_data.get("message") != "OK":
+                break
+
+            chunk = list(itertools.islice(iterator, chunk_size))
+
+        return (ret_code, ret_data)
+
 
 ################################################################################
 # Functions
 ################################################################################
 
+
+def rows_to_csv(rows: list) -> bytes:
+    """
+    Encodes rows as CSV data for the upload.
+    The columns are the keys of all rows in the order of their first appearance.
+    Missing values are left empty.
+
+    Args:
+        rows (list): The rows as dictionaries, in which the keys are the columns.
+
+    Returns:
+        bytes: The CSV data including the header line.
+    """
+    columns: dict = {}
+
+    if not rows:
+        raise ValueError("No rows to upload.")
+
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError("Each row must be a JSON object.")
+
+        columns.update(dict.fromkeys(row))
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(columns), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+    return buffer.getvalue().encode(CSV_ENCODING)
+
 ################################################################################
 # Main
 ################################################################################
@@ -0,0 +1,60 @@
+"""Fixtures shared by the tests
+"""
+
+import threading
+import pytest
+
+
+class FakeClient:
+    """Stands in for the Superset client: records the uploads or fails them with an exception,
+        answers the async event requests with the events of a generator.
+    """
+
+    def __init__(self,
+                 exception=None,
+                 server_url: str = "http://superset.example.com",
+                 events=None) -> None:
+        self.server_url = server_url
+        self.uploads: list = []
+        self.requests: list = []
+        self._exception = exception
+        self._events = events
+        self._lock = threading.Lock()
+
+    def _upload(self, database, table, data) -> tuple:
+        """Records the uploaded data or raises the exception.
+        """
+        if self._exception is not None:
+            raise self._exception
+
+        with self._lock:
+            self.uploads.append((database, table, data))
+
+        return (200, {"message": "OK"})
+
+    def upload_csv(self, database, table, csv_data, *_args, **_kwargs) -> tuple:
+        """Records the CSV data or raises the exception.
+        """
+        return self._upload(database, table, csv_data)
+
+    def upload_rows(self, database, table, rows, *_args, **_kwargs) -> tuple:
+        """Records the rows or raises the exception.
+        """
+        return self._upload(database, table, list(rows))
+
+    def request(self, method: str, endpoint: str, **_request_kwargs) -> tuple:
+        """Returns the next events or the result of a job.
+        """
+        self.requests.append((method, endpoint))
+
+        if endpoint == "/async_event/":
+            return (200, {"result": next(self._events)})
+
+        return (200, {"result": [{"endpoint": endpoint}]})
+
+
+@pytest.fixture(name="fake_client")
+def fixture_fake_client():
+    """Returns the class of the fake client to be created with the settings of the test.
+    """
+    return FakeClient
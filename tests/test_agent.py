@@ -0,0 +1,120 @@
+"""Tests of the agent
+"""
+
+import argparse
+import logging
+import socket
+import subprocess
+import sys
+import threading
+import pytest
+from pySupersetCli import agent
+from pySupersetCli.ret import Ret
+
+pytestmark = pytest.mark.skipif(agent.is_supported() is False, reason="No Unix sockets")
+
+LOG: logging.Logger = logging.getLogger("tests.test_agent")
+
+
+def _args(socket_path: str, password: str = "password") -> argparse.Namespace:
+    """Returns the command line arguments of a call.
+    """
+    return argparse.Namespace(server="http://superset.example.com",
+                              user="user",
+                              password=password,
+                              no_ssl=False,
+                              basic_auth=False,
+                              verbose=False,
+                              agent_socket=socket_path,
+                              no_agent=False,
+                              cmd="upload")
+
+
+def _handler(args, superset_client) -> Ret:
+    """Logs the password it got and the client it was called with.
+    """
+    LOG.warning("Executed with password %s and client %s.", args.password, superset_client)
+    return Ret.ERROR_UPLOAD_FAILED
+
+
+def _serve_once(server_agent: agent.Agent, socket_path: str) -> threading.Thread:
+    """Serves one connection on the socket in a thread.
+    """
+    server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server_socket.bind(socket_path)
+    server_socket.listen()
+
+    def serve() -> None:
+        with server_socket:
+            connection, _ = server_socket.accept()
+
+            with connection:
+                server_agent._serve_connection(connection)  # pylint: disable=protected-access
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+
+    return thread
+
+
+def _start_agent(tmp_path) -> tuple:
+    """Starts an agent for one connection and returns it with its socket path.
+    """
+    socket_path = str(tmp_path / "agent.sock")
+    server_agent = agent.Agent(_args(socket_path), "client",
+                               [{"name": "upload", "handler": _handler}])
+
+    return _serve_once(server_agent, socket_path), socket_path
+
+
+def test_forward_without_socket(tmp_path):
+    """Without a socket, the command is not forwarded.
+    """
+    assert agent.forward(_args(str(tmp_path / "missing.sock"))) is None
+
+
+def test_forward_ignores_other_files(tmp_path):
+    """A file which is no socket does not receive the command.
+    """
+    path = tmp_path / "file.sock"
+    path.write_text("", encoding="utf-8")
+
+    assert agent.forward(_args(str(path))) is None
+
+
+def test_forward_rejected_session(tmp_path):
+    """A call with other credentials is not executed by the agent.
+    """
+    thread, socket_path = _start_agent(tmp_path)
+    ret_status = agent.forward(_args(socket_path, password="other"))
+    thread.join()
+
+    assert ret_status is None
+
+
+def test_forward_relays_status_and_logs(tmp_path, caplog):
+    """An accepted command returns the status and the logs of the agent,
+        the password is not forwarded.
+    """
+    thread, socket_path = _start_agent(tmp_path)
+
+    with caplog.at_level(logging.WARNING):
+        ret_status = agent.forward(_args(socket_path))
+
+    thread.join()
+
+    # The agent runs in the same process, so the message is logged by the agent and the call.
+    assert ret_status == Ret.ERROR_UPLOAD_FAILED
+    assert caplog.messages.count("Executed with password None and client client.") == 2
+
+
+def test_command_line_imports_no_client():
+    """Parsing and forwarding a command does not import the HTTP client and the pipeline.
+    """
+    code = ("import sys, pySupersetCli.__main__; " +
+            "print(sorted({'pySupersetCli.superset', 'pySupersetCli.pipeline', 'requests'} & " +
+            "set(sys.modules)))")
+    result = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True, check=True, text=True)
+
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,40 @@
+"""Tests of the async query poller
+"""
+
+import itertools
+import pytest
+from pySupersetCli.async_query import AsyncJob, AsyncQueryPoller
+
+
+def test_as_completed_fetches_results(fake_client):
+    """A done job is yielded with the result fetched from its result URL,
+        a failed job with its errors.
+    """
+    events = iter([
+        [{"id": "1", "job_id": "a", "status": "running"}],
+        [{"id": "2", "job_id": "a", "status": "done", "result_url": "/api/v1/chart/data/a"},
+         {"id": "3", "job_id": "b", "status": "error", "errors": ["failed"]}]
+    ])
+    client = fake_client(events=events)
+    poller = AsyncQueryPoller(client, min_interval=0.01)
+    poller.track(AsyncJob("a"))
+    poller.track(AsyncJob("b"))
+
+    jobs = poller.wait_all(timeout=5.0)
+
+    assert [job.job_id for job in jobs] == ["a", "b"]
+    assert jobs[0].result["result"] == [{"endpoint": "/chart/data/a"}]
+    assert jobs[1].status == AsyncJob.STATUS_ERROR
+    assert jobs[1].errors == ["failed"]
+
+
+def test_as_completed_timeout_while_jobs_change(fake_client):
+    """The deadline is kept even if the jobs change on every poll.
+    """
+    statuses = itertools.cycle(["pending", "running"])
+    events = ([{"id": "1", "job_id": "a", "status": next(statuses)}] for _ in itertools.count())
+    poller = AsyncQueryPoller(fake_client(events=events), min_interval=0.01)
+    poller.track(AsyncJob("a"))
+
+    with pytest.raises(TimeoutError):
+        poller.wait_all(timeout=0.2)
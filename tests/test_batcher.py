@@ -0,0 +1,70 @@
+"""Tests of the upload batcher
+"""
+
+import pytest
+from pySupersetCli.batcher import UploadBatcher
+
+
+def test_flush_uploads_groups(fake_client):
+    """Flushing uploads one request per database and table.
+    """
+    client = fake_client()
+
+    with UploadBatcher(client, max_latency=60.0) as batcher:
+        batcher.add(1, "a", {"value": 1})
+        batcher.add(1, "a", {"value": 2})
+        batcher.add(2, "b", {"value": 3})
+        batcher.flush()
+
+        assert sorted(client.uploads) == [(1, "a", [{"value": 1}, {"value": 2}]),
+                                          (2, "b", [{"value": 3}])]
+        assert batcher.uploaded_rows == 3
+
+
+def test_row_limit_and_close(fake_client):
+    """A full group is uploaded at once, closing uploads the remaining rows.
+    """
+    client = fake_client()
+    batcher = UploadBatcher(client, max_rows=2, max_pending_rows=2, max_latency=60.0)
+
+    for value in range(5):
+        batcher.add(1, "a", {"value": value})
+
+    batcher.close()
+
+    assert [len(rows) for _, _, rows in client.uploads] == [2, 2, 1]
+
+    with pytest.raises(RuntimeError):
+        batcher.add(1, "a", {"value": 5})
+
+
+def test_exception_calls_on_failure(fake_client):
+    """An exception of an upload is passed to the failure callback.
+    """
+    failures = []
+    client = fake_client(KeyError("message"))
+
+    with UploadBatcher(client, on_failure=lambda *args: failures.append(args)) as batcher:
+        batcher.add(1, "a", {"value": 1})
+        batcher.flush()
+
+    assert len(failures) == 1
+    assert failures[0][:3] == (1, "a", [{"value": 1}])
+    assert batcher.failed_rows == 1
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_add_fails_after_thread_stopped(fake_client):
+    """Adding and flushing fail instead of blocking once the upload thread has stopped.
+    """
+    client = fake_client(SystemExit())
+    batcher = UploadBatcher(client, max_rows=1, max_pending_rows=1)
+    batcher.add(1, "a", {"value": 1})
+
+    with pytest.raises(RuntimeError):
+        batcher.add(1, "a", {"value": 2}, timeout=5.0)
+
+    with pytest.raises(RuntimeError):
+        batcher.flush()
+
+    batcher.close()
@@ -0,0 +1,68 @@
+"""Tests of the flattener
+"""
+
+from pySupersetCli.flatten import Flattener
+
+
+def test_flatten_nested_columns():
+    """Nested objects and arrays are flattened into dotted columns,
+        plain columns are kept as they are.
+    """
+    flattener = Flattener()
+    frame = flattener.flatten([{"date": "2025-01-01", "a": {"b": [1, 2]}}])
+
+    assert list(frame.columns) == ["date", "a.b.0", "a.b.1"]
+    assert frame.iloc[0].tolist() == ["2025-01-01", 1, 2]
+
+
+def test_flatten_max_depth():
+    """Values below the maximum depth are written as JSON text.
+    """
+    flattener = Flattener(max_depth=1)
+    frame = flattener.flatten([{"a": {"b": {"c": 1}}}])
+
+    assert list(frame.columns) == ["a.b"]
+    assert frame.iloc[0]["a.b"] == '{"c": 1}'
+
+
+def test_flatten_keeps_null_columns():
+    """A column without any value is kept as empty column and only the
+        nested columns are cached.
+    """
+    flattener = Flattener()
+    key = (1, "dummy")
+    rows = [
+        {"date": "2025-01-01", "a": None, "n": {"b": 1}},
+        {"date": "2025-01-02", "a": None, "n": {"b": 2}}
+    ]
+    frame = flattener.flatten(rows, key=key)
+
+    assert list(frame.columns) == ["date", "a", "n.b"]
+    assert frame["a"].isna().all()
+    assert flattener._schemas[key] == (["date", "a", "n.b"], {"n"})  # pylint: disable=protected-access
+
+
+def test_flatten_keeps_cached_order():
+    """Further batches of the same table keep the cached column order,
+        even if a nested column is empty in the batch.
+    """
+    flattener = Flattener()
+    key = (1, "dummy")
+    flattener.flatten([{"date": "2025-01-01", "a": 1, "n": {"b": 1}}], key=key)
+    frame = flattener.flatten([{"a": 2, "date": "2025-01-02", "n": None}], key=key)
+
+    assert list(frame.columns) == ["date", "a", "n.b"]
+    assert frame.iloc[0]["a"] == 2
+    assert frame["n.b"].isna().all()
+
+
+def test_flatten_new_nested_column():
+    """A nested column not seen in earlier batches of the table is flattened as well.
+    """
+    flattener = Flattener()
+    key = (1, "dummy")
+    flattener.flatten([{"date": "2025-01-01", "a": 1}], key=key)
+    frame = flattener.flatten([{"date": "2025-01-02", "a": 2, "b": {"c": 3}}], key=key)
+
+    assert list(frame.columns) == ["date", "a", "b.c"]
+    assert frame.iloc[0]["b.c"] == 3
@@ -0,0 +1,99 @@
+"""Tests of the JSON codec and the response data
+"""
+
+import json
+import pytest
+import requests
+from pySupersetCli import json_codec
+from pySupersetCli.superset import ResponseData
+
+
+@pytest.fixture(name="backend")
+def fixture_backend():
+    """Restores the default backend after the test.
+    """
+    default_backend = json_codec.BACKEND
+    yield
+    json_codec.set_backend(default_backend)
+
+
+def _response(content: bytes, content_type: str) -> requests.Response:
+    """Creates a response with the content.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = content_type
+    response._content = content  # pylint: disable=protected-access
+
+    return response
+
+
+@pytest.mark.parametrize("name", ["stdlib", "orjson"])
+def test_fallback_to_stdlib(name, backend):  # pylint: disable=unused-argument
+    """Documents only the standard library accepts are decoded with either backend.
+    """
+    if (name == "orjson") and (json_codec.orjson is None):
+        pytest.skip("orjson is not installed")
+
+    json_codec.set_backend(name)
+    decoded = json_codec.loads(b'{"nan": NaN, "big": 18446744073709551616}')
+
+    assert decoded["nan"] != decoded["nan"]
+    assert decoded["big"] == 2 ** 64
+
+
+def test_custom_backend(backend):  # pylint: disable=unused-argument
+    """A plugged in decoder is used, documents it rejects are decoded by the standard library.
+    """
+    calls = []
+
+    def custom_loads(data):
+        calls.append(data)
+        return json.loads(data, parse_int=str)
+
+    json_codec.set_backend("custom", custom_loads)
+
+    assert json_codec.loads(b'{"a": 1}') == {"a": "1"}
+    assert json_codec.loads(b'{"a": NaN}')["a"] != 0
+    assert len(calls) == 2
+
+    with pytest.raises(ValueError):
+        json_codec.set_backend("unknown")
+
+
+def test_response_data_decoded_on_first_access(monkeypatch):
+    """The response is decoded once, on the first access.
+    """
+    calls = []
+    monkeypatch.setattr(json_codec, "loads", lambda data: calls.append(data) or {"a": 1})
+    data = ResponseData(_response(b'{"a": 1}', "application/json"))
+
+    assert not calls
+    assert data["a"] == 1
+    assert dict(data) == {"a": 1}
+    assert len(calls) == 1
+
+
+def test_response_data_not_json():
+    """Responses which are not JSON appear empty, their content is kept.
+    """
+    data = ResponseData(_response(b"date,value\n", "text/csv"))
+
+    assert not data
+    assert data.get("message") is None
+    assert data.content == b"date,value\n"
+
+
+def test_response_data_read_only():
+    """The response data is a read-only mapping, dict() gives a modifiable copy.
+    """
+    data = ResponseData(data={"message": "OK"})
+
+    with pytest.raises(TypeError):
+        data["message"] = "changed"  # pylint: disable=unsupported-assignment-operation
+
+    copy = dict(data)
+    copy["message"] = "changed"
+
+    assert data["message"] == "OK"
+    assert json.dumps(copy) == '{"message": "changed"}'
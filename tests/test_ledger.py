@@ -0,0 +1,75 @@
+"""Tests of the upload ledger
+"""
+
+from pySupersetCli import ledger
+from pySupersetCli.ledger import UploadLedger
+
+_SERVER = "http://superset.example.com"
+
+
+def test_contains_added_fingerprint():
+    """Only fingerprints added for the same server, database and table are contained.
+    """
+    upload_ledger = UploadLedger()
+    fingerprint = UploadLedger.fingerprint(b"date,value\n2025-01-01,1\n")
+    upload_ledger.add(_SERVER, 1, "a", fingerprint)
+
+    assert upload_ledger.contains(_SERVER, 1, "a", fingerprint) is True
+    assert upload_ledger.contains(_SERVER, 1, "b", fingerprint) is False
+    assert upload_ledger.contains(_SERVER, 2, "a", fingerprint) is False
+
+
+def test_evicts_oldest_entries():
+    """The oldest fingerprints of a table are evicted beyond the maximum number.
+    """
+    upload_ledger = UploadLedger(max_entries=2)
+
+    for fingerprint in ("1", "2", "3"):
+        upload_ledger.add(_SERVER, 1, "a", fingerprint)
+
+    assert upload_ledger.contains(_SERVER, 1, "a", "1") is False
+    assert upload_ledger.contains(_SERVER, 1, "a", "2") is True
+    assert upload_ledger.contains(_SERVER, 1, "a", "3") is True
+
+
+def test_evicts_outdated_entries(monkeypatch):
+    """Fingerprints older than the maximum age are not contained anymore.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(ledger.time, "time", lambda: now[0])
+    upload_ledger = UploadLedger(max_age=60.0)
+    upload_ledger.add(_SERVER, 1, "a", "1")
+    now[0] += 61.0
+
+    assert upload_ledger.contains(_SERVER, 1, "a", "1") is False
+
+
+def test_reads_fingerprints_of_other_ledgers(tmp_path):
+    """Fingerprints appended to the file by another ledger are found.
+    """
+    path = str(tmp_path / "ledger.txt")
+    first = UploadLedger(path)
+    second = UploadLedger(path)
+    second.add(_SERVER, 1, "a", "1")
+
+    assert first.contains(_SERVER, 1, "a", "1") is True
+    assert UploadLedger(path).contains(_SERVER, 1, "a", "1") is True
+
+
+def test_compaction_keeps_fingerprints_of_other_ledgers(tmp_path):
+    """Compacting the file keeps the fingerprints another ledger appended meanwhile.
+    """
+    path = tmp_path / "ledger.txt"
+    first = UploadLedger(str(path), max_entries=2)
+    second = UploadLedger(str(path), max_entries=2)
+    second.add(_SERVER, 1, "b", "other")
+
+    for fingerprint in range(6):
+        first.add(_SERVER, 1, "a", str(fingerprint))
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+
+    assert len(lines) < 7
+    assert UploadLedger(str(path)).contains(_SERVER, 1, "b", "other") is True
+    assert second.contains(_SERVER, 1, "a", "5") is True
+    assert second.contains(_SERVER, 1, "a", "0") is False
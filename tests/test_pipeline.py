@@ -0,0 +1,70 @@
+"""Tests of the upload pipeline
+"""
+
+import json
+from pySupersetCli.pipeline import UploadPipeline
+from pySupersetCli.schema import SchemaError
+
+
+def _write_files(tmp_path, count: int) -> list:
+    """Writes JSON input files with one row each.
+    """
+    paths = []
+
+    for index in range(count):
+        path = tmp_path / f"input_{index}.json"
+        path.write_text(json.dumps({"date": "2025-01-01", "value": index}), encoding="utf-8")
+        paths.append(str(path))
+
+    return paths
+
+
+def test_run_uploads_all_chunks(tmp_path, fake_client):
+    """All files are uploaded in chunks of the given number of files.
+    """
+    client = fake_client()
+    pipeline = UploadPipeline(client, 1, "dummy", column_dates=["date"],
+                              processes=1, uploaders=2, files_per_chunk=2)
+
+    assert pipeline.run(_write_files(tmp_path, 5)) is True
+    assert len(client.uploads) == 3
+    assert pipeline.stats.upload.rows == 5
+
+
+def test_run_counts_failed_uploads(tmp_path, fake_client):
+    """An exception of an upload counts as failed chunk and does not stop the pipeline,
+        even if there are more chunks than the queue can hold.
+    """
+    client = fake_client(KeyError("message"))
+    pipeline = UploadPipeline(client, 1, "dummy", column_dates=["date"],
+                              processes=1, uploaders=1, files_per_chunk=1, queue_size=1)
+
+    assert pipeline.run(_write_files(tmp_path, 6)) is False
+    assert pipeline.stats.servers[client.server_url].failed_chunks == 6
+
+
+def test_run_reports_results_per_server(tmp_path, fake_client):
+    """The results of the uploads are kept for each server.
+    """
+    working_client = fake_client(server_url="http://a.example.com")
+    failing_client = fake_client(KeyError("message"), server_url="http://b.example.com")
+    pipeline = UploadPipeline([working_client, failing_client], 1, "dummy",
+                              column_dates=["date"], processes=1, files_per_chunk=2)
+
+    assert pipeline.run(_write_files(tmp_path, 4)) is False
+    assert pipeline.stats.servers["http://a.example.com"].uploaded_chunks == 2
+    assert pipeline.stats.servers["http://a.example.com"].failed_chunks == 0
+    assert pipeline.stats.servers["http://b.example.com"].failed_chunks == 2
+    assert len(working_client.uploads) == 2
+
+
+def test_run_collects_schema_errors(tmp_path, fake_client):
+    """The mismatches of chunks not matching the table are kept for the server.
+    """
+    client = fake_client(SchemaError("dummy", ["Unknown columns ['value']"]))
+    pipeline = UploadPipeline(client, 1, "dummy", column_dates=["date"],
+                              processes=1, files_per_chunk=1)
+
+    assert pipeline.run(_write_files(tmp_path, 2)) is False
+    assert pipeline.stats.servers[client.server_url].schema_errors == \
+        ["Unknown columns ['value']"] * 2
@@ -0,0 +1,61 @@
+"""Tests of the schema validation
+"""
+
+from pySupersetCli.schema import SchemaError, order_csv, validate_csv
+
+_TABLE_COLUMNS = ["date", "a", "b"]
+
+
+def test_matching_data():
+    """Data with a subset of the columns in the table order matches.
+    """
+    csv_data = b"date,b\n2025-01-01,1\n2025-01-02,\n"
+
+    assert not validate_csv(csv_data, _TABLE_COLUMNS, ["date"])
+
+
+def test_unknown_column():
+    """A column not in the table is reported.
+    """
+    errors = validate_csv(b"date,c\n2025-01-01,1\n", _TABLE_COLUMNS)
+
+    assert len(errors) == 1
+    assert "['c']" in errors[0]
+
+
+def test_column_order():
+    """Columns in another order than in the table match and are written in the table order.
+    """
+    csv_data = b'b,date\n"1,5",2025-01-01\n2,\n'
+
+    assert not validate_csv(csv_data, _TABLE_COLUMNS, ["date"])
+    assert order_csv(csv_data, _TABLE_COLUMNS) == b'date,b\n2025-01-01,"1,5"\n,2\n'
+
+
+def test_ordered_data_unchanged():
+    """Data already in the order of the table is returned as it is.
+    """
+    csv_data = b"date,a\n2025-01-01,1\n"
+
+    assert order_csv(csv_data, _TABLE_COLUMNS) is csv_data
+
+
+def test_invalid_dates():
+    """Each value of a date column which is not a date is reported with its row.
+    """
+    csv_data = b"date,a\n2025-01-01,1\nyesterday,2\n,3\nnope,4\n"
+    errors = validate_csv(csv_data, _TABLE_COLUMNS, ["date"])
+
+    assert errors == ["Row 2: 'yesterday' in column 'date' is not a date",
+                      "Row 4: 'nope' in column 'date' is not a date"]
+
+
+def test_schema_error_message():
+    """The message of a schema error contains a limited number of errors.
+    """
+    error = SchemaError("dummy", [f"error {index}" for index in range(12)])
+
+    assert error.errors[11] == "error 11"
+    assert "error 9" in str(error)
+    assert "error 10" not in str(error)
+    assert "and 2 more" in str(error)
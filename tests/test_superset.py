@@ -0,0 +1,200 @@
+"""Tests of the Superset client
+"""
+
+import json
+import threading
+import time
+import pytest
+import requests
+from pySupersetCli import superset
+from pySupersetCli.superset import ResponseData, Superset, rows_to_csv
+from pySupersetCli.schema import SchemaError
+
+
+class _StubSuperset(Superset):
+    """Answers the requests with the given table columns instead of a server.
+    """
+
+    def __init__(self, table_columns: list) -> None:
+        self.table_columns: list = table_columns
+        self.requests: list = []
+        super().__init__("http://superset.example.com", "user", "password",
+                         Superset.Provider.DB)
+
+    def _login(self, username, password, provider) -> None:
+        pass
+
+    def request(self, method: str, endpoint: str, *_args, **request_kwargs) -> tuple:
+        self.requests.append((method, endpoint, request_kwargs))
+
+        if "table_metadata" in endpoint:
+            columns = [{"name": column} for column in self.table_columns]
+            return (200, ResponseData(data={"columns": columns}))
+
+        return (200, ResponseData(data={"message": "OK"}))
+
+    def uploaded_csv(self) -> list:
+        """Returns the CSV data of all uploads.
+        """
+        return [kwargs["files"]["file"][1] for method, _, kwargs in self.requests
+                if method == "POST"]
+
+
+class _FakeSession:  # pylint: disable=too-few-public-methods
+    """Acts as server whose first access token has expired.
+    """
+
+    def __init__(self) -> None:
+        self.refresh_count: int = 0
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: dict, **_kwargs) -> requests.Response:
+        """Answers the login, token and data requests.
+        """
+        if url.endswith("/security/login"):
+            return _response(200, {"access_token": "expired", "refresh_token": "refresh"})
+
+        if url.endswith("/security/csrf_token/"):
+            return _response(200, {"result": "csrf"})
+
+        if url.endswith("/security/refresh"):
+            with self._lock:
+                self.refresh_count += 1
+
+            # Let the other threads run into the expired token meanwhile.
+            time.sleep(0.1)
+            return _response(200, {"access_token": "new"})
+
+        if headers.get("Authorization") != "Bearer new":
+            return _response(401, {"msg": "Token has expired"})
+
+        return _response(200, {"method": method})
+
+
+def _response(status_code: int, data: dict) -> requests.Response:
+    """Creates a JSON response.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(data).encode("utf-8")  # pylint: disable=protected-access
+
+    return response
+
+
+def test_concurrent_token_refresh(monkeypatch):
+    """Threads running into the expired token at once refresh it only once.
+    """
+    session = _FakeSession()
+    monkeypatch.setattr(superset.requests, "Session", lambda: session)
+    client = Superset("http://superset.example.com", "user", "password", Superset.Provider.DB)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(client.request("GET", "/chart/")))
+               for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert session.refresh_count == 1
+    assert [ret_code for ret_code, _ in results] == [200] * 8
+
+
+def test_upload_in_table_order():
+    """The columns are uploaded in the order of the table.
+    """
+    client = _StubSuperset(["date", "value"])
+    ret_code, ret_data = client.upload_rows(1, "dummy", [{"value": 1, "date": "2025-01-01"}],
+                                            column_dates=["date"])
+
+    assert ret_code == 200
+    assert ret_data["message"] == "OK"
+    assert client.uploaded_csv() == [b"date,value\n2025-01-01,1\n"]
+
+
+def test_new_column_requests_columns_again():
+    """A column unknown to the cached columns requests the columns of the table again.
+    """
+    client = _StubSuperset(["date", "value"])
+    client.upload_rows(1, "dummy", [{"date": "2025-01-01", "value": 1}])
+    client.table_columns = ["date", "value", "other"]
+    ret_code, _ = client.upload_rows(1, "dummy", [{"date": "2025-01-01", "other": 2}])
+
+    assert ret_code == 200
+    assert len(client.uploaded_csv()) == 2
+
+    with pytest.raises(SchemaError):
+        client.upload_rows(1, "dummy", [{"date": "2025-01-01", "unknown": 3}])
+
+    assert len(client.uploaded_csv()) == 2
+
+
+def test_rows_to_csv_with_different_keys():
+    """The columns are the union of the keys of all rows, missing values are empty.
+    """
+    csv_data = rows_to_csv([{"date": "2025-01-01", "a": 1}, {"b": 2, "date": "2025-01-02"}])
+
+    assert csv_data == b"date,a,b\n2025-01-01,1,\n2025-01-02,,2\n"
+
+
+@pytest.mark.parametrize("rows", [[], [{"a": 1}, [1]]])
+def test_rows_to_csv_invalid_rows(rows):
+    """No rows or rows which are no dictionaries are rejected.
+    """
+    with pytest.raises(ValueError):
+        rows_to_csv(rows)
+
+
+def test_upload_dataframe():
+    """A DataFrame is uploaded without its index.
+    """
+    pandas = pytest.importorskip("pandas")
+    client = _StubSuperset(["date", "value"])
+    ret_code, _ = client.upload_dataframe(1, "dummy",
+                                          pandas.DataFrame({"date": ["2025-01-01"], "value": [1]}))
+
+    assert ret_code == 200
+    assert client.uploaded_csv() == [b"date,value\n2025-01-01,1\n"]
+
+
+def test_upload_iterable_in_chunks():
+    """The rows of a generator are uploaded in chunks of the chunk size.
+    """
+    client = _StubSuperset(["value"])
+    ret_code, ret_data = client.upload_iterable(1, "dummy",
+                                                ({"value": index} for index in range(5)),
+                                                chunk_size=2)
+
+    assert ret_code == 200
+    assert ret_data["message"] == "OK"
+    assert client.uploaded_csv() == [b"value\n0\n1\n", b"value\n2\n3\n", b"value\n4\n"]
+
+    with pytest.raises(ValueError):
+        client.upload_iterable(1, "dummy", [{"value": 1}], chunk_size=0)
+
+
+def test_upload_iterable_stops_at_failed_chunk(monkeypatch):
+    """No further chunks are uploaded after a chunk failed.
+    """
+    client = _StubSuperset(["value"])
+    chunks = []
+
+    def upload_rows(_database, _table, rows, *_args, **_kwargs) -> tuple:
+        chunks.append(rows)
+
+        if len(chunks) == 2:
+            return (422, ResponseData(data={"message": "Invalid data"}))
+
+        return (200, ResponseData(data={"message": "OK"}))
+
+    monkeypatch.setattr(client, "upload_rows", upload_rows)
+    ret_code, ret_data = client.upload_iterable(1, "dummy",
+                                                ({"value": index} for index in range(10)),
+                                                chunk_size=3)
+
+    assert ret_code == 422
+    assert ret_data["message"] == "Invalid data"
+    assert len(chunks) == 2